@@ -0,0 +1,232 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+APIs to run exports in the background and download the result files.
+"""
+
+import os, re
+
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.generics import GenericAPIView
+from rest_framework.response import Response
+
+from ..docs import extend_schema, OpenApiResponse
+from ..exports import (DONE, create_export_job, get_export_job,
+    get_result_path, is_expired)
+from ..compat import gettext_lazy as _, reverse
+from ..mixins import AppMixin
+from ..views.download import CSVDownloadView, UserEngagementCSVView
+from .serializers import ExportJobSerializer
+
+
+class ExportJobGone(APIException):
+
+    status_code = status.HTTP_410_GONE
+    default_detail = _("The export has expired.")
+    default_code = 'gone'
+
+
+class ExportJobMixin(AppMixin):
+
+    serializer_class = ExportJobSerializer
+
+    @property
+    def job(self):
+        if not hasattr(self, '_job'):
+            self._job = get_export_job(self.kwargs.get('job'))
+            if not self._job or self._job['app'] != self.app.pk:
+                raise NotFound()
+            if is_expired(self._job):
+                raise ExportJobGone()
+        return self._job
+
+    def get_job_representation(self, job):
+        if job['state'] == DONE:
+            job['location'] = self.request.build_absolute_uri(reverse(
+                'rules_api_export_download',
+                kwargs=dict(self.kwargs, job=job['id'])))
+        return self.get_serializer(job).data
+
+
+class UserEngagementExportAPIView(ExportJobMixin, GenericAPIView):
+    """
+    Exports engagement in the background
+
+    Starts a job which writes the user engagement in a file
+    (CSV or NDJSON format). The job status is then polled
+    until its state is "done" and the file is downloaded from *location*.
+
+    Query parameters are passed to the export as they would be
+    to the download URL.
+
+    **Tags: rbac, broker, appmodel
+
+    **Examples
+
+    .. code-block:: http
+
+        POST /api/proxy/engagement/exports HTTP/1.1
+
+    .. code-block:: json
+
+        {
+          "format": "ndjson"
+        }
+
+    responds
+
+    .. code-block:: json
+
+        {
+          "id": "0b1d0d2c-4f0e-4d1b-9c67-5f0e4c0d9a8e",
+          "state": "pending",
+          "format": "ndjson",
+          "rows": 0,
+          "created_at": "2026-10-19T00:00:00Z",
+          "updated_at": "2026-10-19T00:00:00Z"
+        }
+    """
+    view_class = UserEngagementCSVView
+
+    @extend_schema(responses={
+        202: OpenApiResponse(ExportJobSerializer)})
+    def post(self, request, *args, **kwargs):
+        #pylint:disable=unused-argument
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = create_export_job(self.view_class, self.app,
+            request.query_params, serializer.validated_data.get(
+                'format', self.view_class.CSV_FORMAT))
+        return Response(self.get_job_representation(job),
+            status=status.HTTP_202_ACCEPTED)
+
+
+class ExportJobDetailAPIView(ExportJobMixin, GenericAPIView):
+    """
+    Retrieves an export job
+
+    Returns the state of an export job and, once it is done,
+    the *location* to download the file from. Files are deleted
+    a configurable time after the job completed, from then on
+    the job is gone (410).
+
+    **Tags: rbac, broker, appmodel
+
+    **Examples
+
+    .. code-block:: http
+
+        GET /api/proxy/engagement/exports/0b1d0d2c-4f0e-4d1b-9c67-5f0e4c0d9a8e HTTP/1.1
+
+    responds
+
+    .. code-block:: json
+
+        {
+          "id": "0b1d0d2c-4f0e-4d1b-9c67-5f0e4c0d9a8e",
+          "state": "done",
+          "format": "ndjson",
+          "rows": 120034,
+          "size": 5306242,
+          "created_at": "2026-10-19T00:00:00Z",
+          "updated_at": "2026-10-19T00:01:12Z",
+          "location": "https://example.com/api/proxy/engagement/exports/0b1d0d2c-4f0e-4d1b-9c67-5f0e4c0d9a8e/download"
+        }
+    """
+    def get(self, request, *args, **kwargs):
+        #pylint:disable=unused-argument
+        return Response(self.get_job_representation(self.job))
+
+
+class ExportJobDownloadAPIView(ExportJobMixin, GenericAPIView):
+    """
+    Downloads the file of an export job
+
+    Supports single byte ranges (``Range: bytes=start-end``) such that
+    interrupted downloads can be resumed.
+
+    **Tags: rbac, broker, appmodel
+
+    **Examples
+
+    .. code-block:: http
+
+        GET /api/proxy/engagement/exports/0b1d0d2c-4f0e-4d1b-9c67-5f0e4c0d9a8e/download HTTP/1.1
+    """
+    block_size = 64 * 1024
+    range_re = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+    def read_file(self, path, start, length):
+        with open(path, 'rb') as result_file:
+            result_file.seek(start)
+            while length > 0:
+                data = result_file.read(min(self.block_size, length))
+                if not data:
+                    break
+                length -= len(data)
+                yield data
+
+    def get(self, request, *args, **kwargs):
+        #pylint:disable=unused-argument
+        job = self.job
+        if job['state'] != DONE:
+            raise NotFound("export is %s" % job['state'])
+        path = get_result_path(job)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            # Deleted as it expired.
+            raise ExportJobGone()
+        start, end = 0, size - 1
+        status_code = status.HTTP_200_OK
+        look = self.range_re.match(request.META.get('HTTP_RANGE', ''))
+        if look and (look.group(1) or look.group(2)):
+            if look.group(1):
+                start = int(look.group(1))
+                if look.group(2):
+                    end = min(int(look.group(2)), size - 1)
+            else:
+                # suffix range: the last N bytes.
+                start = max(size - int(look.group(2)), 0)
+            if start > end:
+                resp = StreamingHttpResponse([],
+                    status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                resp['Content-Range'] = 'bytes */%d' % size
+                return resp
+            status_code = status.HTTP_206_PARTIAL_CONTENT
+        resp = StreamingHttpResponse(
+            self.read_file(path, start, end - start + 1), status=status_code,
+            content_type=CSVDownloadView.content_types.get(
+                job['format'], 'application/octet-stream'))
+        resp['Accept-Ranges'] = 'bytes'
+        resp['Content-Length'] = str(end - start + 1)
+        if status_code == status.HTTP_206_PARTIAL_CONTENT:
+            resp['Content-Range'] = 'bytes %d-%d/%d' % (start, end, size)
+        resp['Content-Disposition'] = 'attachment; filename="%s"' % (
+            job['filename'])
+        return resp
@@ -24,13 +24,15 @@
 
 from random import choice
 
+from django.db import transaction
 from rest_framework.response import Response
 from rest_framework.generics import GenericAPIView, RetrieveUpdateAPIView
 
 from ..compat import gettext_lazy as _
 from ..docs import extend_schema
-from ..mixins import AppMixin
-from ..utils import get_app_model, get_app_serializer
+from ..mixins import AppMixin, AppVersionMixin
+from ..utils import (get_app_model, get_app_serializer,
+    update_app_version)
 from .serializers import AppKeySerializer
 
 
@@ -71,10 +73,11 @@ class GenerateKeyAPIView(AppMixin, GenericAPIView):
                 choice("abcdefghijklmnopqrstuvwxyz0123456789!@#$%^*-_=+")
                 for idx in range(16)]) #pylint: disable=unused-variable
         self.app.save()
+        transaction.on_commit(lambda: update_app_version(self.app))
         return Response(self.get_serializer().to_representation(self.app))
 
 
-class AppUpdateAPIView(AppMixin, RetrieveUpdateAPIView):
+class AppUpdateAPIView(AppVersionMixin, AppMixin, RetrieveUpdateAPIView):
     """
     Retrieves forward end-point
 
@@ -148,4 +151,5 @@ class AppUpdateAPIView(AppMixin, RetrieveUpdateAPIView):
 
     def perform_update(self, serializer):
         serializer.save()
+        transaction.on_commit(lambda: update_app_version(self.app))
         serializer.instance.detail = _("Update successful.")
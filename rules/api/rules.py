@@ -22,26 +22,38 @@
 # OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
 # ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-import datetime, logging
+import datetime, itertools, logging, os
 
 from dateutil.relativedelta import relativedelta
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db import transaction
-from django.db.models import F, Q, Max, Count
+from django.db.models import Count, F, Min, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import override
 from django.db.utils import IntegrityError
 from rest_framework.generics import (get_object_or_404, GenericAPIView,
     ListCreateAPIView, RetrieveUpdateDestroyAPIView, ListAPIView)
 from rest_framework.response import Response
 from rest_framework import serializers
 
-from .serializers import (RuleSerializer, RuleRankUpdateSerializer,
-    UserEngagementSerializer, EngagementsSerializer)
+from .serializers import (RuleSerializer, RuleListSyncSerializer,
+    RuleRankUpdateSerializer, UserEngagementSerializer, EngagementsSerializer,
+    EngagementCohortListSerializer, EngagementSeriesListSerializer,
+    LatencyStatsSerializer, RuleStatSerializer)
 from .. import settings
-from ..compat import timezone_or_utc
+from ..compat import six, timezone_or_utc
 from ..docs import extend_schema, OpenApiResponse
-from ..mixins import AppMixin
-from ..models import Rule, Engagement
-from ..utils import parse_tz, datetime_or_now
+from ..latency import ENTRY_POINT, RULE, get_latencies
+from ..metrics import count_cache
+from ..mixins import AppMixin, AppVersionMixin
+from ..models import ActivityRollup, Engagement, EngagementRollup, Rule
+from ..pagination import KeysetPaginationMixin
+from ..perms import get_shadowed_rules
+from ..signals import rules_updated
+from ..utils import (bin_by_period, datetime_or_now, get_period_index,
+    get_period_starts, parse_tz)
 
 
 LOGGER = logging.getLogger(__name__)
@@ -65,39 +77,67 @@ class RuleMixin(AppMixin):
     def get_queryset(self):
         return self.model.objects.get_rules(self.app)
 
-    def insert_space(self, queryset, rank=1):
-        queryset.filter(rank__gte=rank).update(rank=F('rank') + 1, moved=True)
-        queryset.filter(moved=True).update(moved=False)
-
-
     def perform_create(self, serializer):
-        # XXX adds rule at the top or bottom (False and True respectively).
-        last_rank = 1
-        if False:
-            # We don't compact ranks after DELETE
-            last_rank_qs = self.get_queryset().aggregate(Max('rank')).get(
-                'rank__max', 0)
-            # If the key exists and return None the default value is not applied
-            if last_rank_qs is not None:
-                last_rank = last_rank_qs + 1
-        if not self.get_queryset().filter(
-            path=serializer.validated_data['path']).exists():
-            # If the path exists, we do not want to create a hole
-            # when we are guarenteed to fail on insert.
-            self.insert_space(self.get_queryset(), rank=last_rank)
-        serializer.save(app=self.app, rank=last_rank)
+        # New rules are added at the top of the list.
+        first_rank = self.get_queryset().aggregate(Min('rank')).get(
+            'rank__min')
+        serializer.save(app=self.app,
+            rank=self.model.get_rank_between(upper=first_rank))
+        self.send_rules_updated()
+
+    def send_rules_updated(self):
+        transaction.on_commit(lambda: rules_updated.send(
+            sender=__name__, app=self.app))
+
+    def move_rules(self, moves):
+        """
+        Applies the sequence of (oldrank, newrank) *moves* on the access
+        rules loaded in memory, then saves the ranks that changed at once.
+
+        Moves are applied one after the other on the ranks as the client
+        sees them, i.e. moving a rule shifts the ranks of all rules
+        in-between by one, and ranks in a move refer to the ranks once
+        the previous moves were applied.
+        """
+        rules = list(self.get_queryset())
+        ranks = {rule.pk: rule.rank for rule in rules}
+        for oldrank, newrank in moves:
+            by_rank = {rank: pk for pk, rank in six.iteritems(ranks)}
+            moved_pk = by_rank.get(oldrank)
+            if moved_pk is None:
+                LOGGER.info("unable to move rule with rank=%d to rank=%d",
+                    oldrank, newrank)
+                continue
+            for pk, rank in six.iteritems(ranks):
+                if newrank <= rank < oldrank:
+                    ranks[pk] = rank + 1
+                elif oldrank < rank <= newrank:
+                    ranks[pk] = rank - 1
+            ranks[moved_pk] = newrank
+        rules.sort(key=lambda rule: ranks[rule.pk])
+        self.model.objects.reorder(self.app, rules)
 
     def perform_update(self, serializer):
         serializer.save(app=self.app)
+        self.send_rules_updated()
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        self.send_rules_updated()
 
 
-class RuleListAPIView(RuleMixin, ListCreateAPIView):
+class RuleListAPIView(AppVersionMixin, KeysetPaginationMixin, RuleMixin,
+                      ListCreateAPIView):
     """
     Lists access rules
 
     Returns a list of {{PAGE_SIZE}} rules incoming HTTP requests
     are checked against.
 
+    Pass a `cursor` query parameter (empty for the first page) to page
+    through rules by rank with the `next` links, without total count
+    unless a `count` query parameter is also present.
+
     **Tags: rbac, broker, appmodel
 
     **Examples
@@ -126,10 +166,13 @@ class RuleListAPIView(RuleMixin, ListCreateAPIView):
         }
     """
     serializer_class = RuleSerializer
+    keyset_ordering = ('rank',)
 
     def get_serializer_class(self):
         if self.request.method.lower() in ('patch',):
             return RuleRankUpdateSerializer
+        if self.request.method.lower() in ('put',):
+            return RuleListSyncSerializer
         return super(RuleListAPIView, self).get_serializer_class()
 
     def get_queryset(self):
@@ -197,8 +240,9 @@ class RuleListAPIView(RuleMixin, ListCreateAPIView):
         Updates order of rules
 
         When receiving a request like [{"newpos": 1, "oldpos": 3}],
-        it will move the rule at position 3 to position 1, updating all
-        rules ranks in-between.
+        it will move the rule ranked 3 right before the rule ranked 1
+        (right after when a rule is moved down the list). Only the rank
+        of the moved rule is updated.
 
         **Tags: rbac, broker, appmodel
 
@@ -239,30 +283,83 @@ class RuleListAPIView(RuleMixin, ListCreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         with transaction.atomic():
-            for move in serializer.validated_data['updates']:
-                try:
-                    oldrank = move['oldpos']
-                    newrank = move['newpos']
-                    queryset = self.get_queryset()
-                    updated = queryset.get(rank=oldrank)
-                    if newrank < oldrank:
-                        queryset.filter(Q(rank__gte=newrank)
-                                        & Q(rank__lt=oldrank)).update(
-                            rank=F('rank') + 1, moved=True)
-                    else:
-                        queryset.filter(Q(rank__lte=newrank)
-                                        & Q(rank__gt=oldrank)).update(
-                            rank=F('rank') - 1, moved=True)
-                    updated.rank = newrank
-                    updated.moved = True
-                    updated.save(update_fields=['rank', 'moved'])
-                    queryset.filter(moved=True).update(moved=False)
-                except Rule.DoesNotExist:
-                    LOGGER.info("unable to move rule with rank=%d to rank=%d",
-                        oldrank, newrank)
+            # `rules_updated` is sent by `RuleManager.reorder`.
+            self.move_rules([(move['oldpos'], move['newpos'])
+                for move in serializer.validated_data['updates']])
 
         return self.list(request, *args, **kwargs)
 
+    @extend_schema(operation_id='proxy_rules_sync',
+    responses={
+      200: OpenApiResponse(RuleSerializer(many=True))})
+    def put(self, request, *args, **kwargs):
+        """
+        Replaces all rules
+
+        Replaces all access rules by the complete, ordered, list of rules
+        passed in the request. Rules whose path is not in the list are
+        deleted, rules with a new path are created, and existing rules
+        are updated only when a field or their relative order changed.
+
+        **Tags: rbac, broker, appmodel
+
+        **Examples
+
+        .. code-block:: http
+
+            PUT /api/proxy/rules HTTP/1.1
+
+        .. code-block:: json
+
+            {"rules": [
+              {
+                "path": "/app",
+                "allow": "1",
+                "is_forward": true,
+                "engaged": "app"
+              },
+              {
+                "path": "/",
+                "allow": "0",
+                "is_forward": false,
+                "engaged": ""
+              }
+            ]}
+
+        responds
+
+        .. code-block:: json
+
+            {
+                "count": 2,
+                "next": null,
+                "previous": null,
+                "results": [
+                    {
+                        "rank": 1024,
+                        "path": "/app",
+                        "allow": "1",
+                        "is_forward": true,
+                        "engaged": "app"
+                    },
+                    {
+                        "rank": 2048,
+                        "path": "/",
+                        "allow": "0",
+                        "is_forward": false,
+                        "engaged": ""
+                    }
+                ]
+            }
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            # `rules_updated` is sent by `RuleManager.sync`.
+            self.model.objects.sync(self.app,
+                serializer.validated_data['rules'])
+        return self.list(request, *args, **kwargs)
+
     def list(self, request, *args, **kwargs):
         # If we were to use `get_serializer`, it would return the calling
         # arguments serializer instead of the result serialize for PATCH calls.
@@ -277,6 +374,141 @@ class RuleListAPIView(RuleMixin, ListCreateAPIView):
         return Response(serializer.data)
 
 
+class RuleStatsAPIView(KeysetPaginationMixin, AppMixin, ListAPIView):
+    """
+    Lists hit counters of access rules
+
+    Returns {{PAGE_SIZE}} rules, ordered by rank, with the number of requests
+    they matched, denied and forwarded since they were created. Counters
+    are saved by each worker every `STATS_FLUSH_INTERVAL` seconds.
+
+    `shadowed_by` is the path of an earlier-ranked rule which matches every
+    request path the rule would match, i.e. the rule is unreachable.
+    Pass a `shadowed` query parameter to only list unreachable rules.
+
+    **Tags: rbac, broker, appmodel
+
+    **Examples
+
+    .. code-block:: http
+
+        GET /api/proxy/stats/rules HTTP/1.1
+
+    responds
+
+    .. code-block:: json
+
+        {
+            "count": 2,
+            "next": null,
+            "previous": null,
+            "results": [
+                {
+                    "rank": 1024,
+                    "path": "/app/",
+                    "hits": 1250,
+                    "denied": 12,
+                    "forwarded": 1238,
+                    "last_hit_at": "2026-10-19T17:00:00Z",
+                    "shadowed_by": null
+                },
+                {
+                    "rank": 2048,
+                    "path": "/app/{profile}/",
+                    "hits": 0,
+                    "denied": 0,
+                    "forwarded": 0,
+                    "last_hit_at": null,
+                    "shadowed_by": "/app/"
+                }
+            ]
+        }
+    """
+    serializer_class = RuleStatSerializer
+    keyset_ordering = ('rank',)
+
+    @property
+    def shadowed(self):
+        if not hasattr(self, '_shadowed'):
+            self._shadowed = get_shadowed_rules(
+                Rule.objects.get_rules(self.app))
+        return self._shadowed
+
+    def get_queryset(self):
+        queryset = Rule.objects.get_rules(self.app).annotate(
+            hits=Coalesce(F('stat__hits'), Value(0)),
+            denied=Coalesce(F('stat__denied'), Value(0)),
+            forwarded=Coalesce(F('stat__forwarded'), Value(0)),
+            last_hit_at=F('stat__last_hit_at'))
+        if 'shadowed' in self.request.query_params:
+            queryset = queryset.filter(pk__in=list(self.shadowed.keys()))
+        return queryset
+
+    def get_serializer_context(self):
+        context = super(RuleStatsAPIView, self).get_serializer_context()
+        context.update({'shadowed': self.shadowed})
+        return context
+
+
+class LatencyStatsAPIView(AppMixin, GenericAPIView):
+
+    serializer_class = LatencyStatsSerializer
+
+    def get(self, request, *args, **kwargs):
+        """
+        Retrieves latency percentiles
+
+        Returns the median, 95th and 99th percentiles and maximum durations,
+        in milliseconds, of the last `LATENCY_WINDOW` requests per entry point
+        and per access rule. Durations are measured from the time the proxy
+        view is called until the response is ready.
+
+        Latencies are kept in memory by each worker process. The response
+        describes the requests served by the worker (`pid`) which handled
+        this call.
+
+        **Tags: rbac, broker, appmodel
+
+        **Examples
+
+        .. code-block:: http
+
+            GET /api/proxy/stats/latency HTTP/1.1
+
+        responds
+
+        .. code-block:: json
+
+            {
+                "pid": 4211,
+                "entry_points": [{
+                    "key": "https://app.example.com",
+                    "count": 5230,
+                    "samples": 1000,
+                    "p50": 45.2,
+                    "p95": 310.7,
+                    "p99": 1250.4,
+                    "max": 2301.9
+                }],
+                "rules": [{
+                    "key": "/app/",
+                    "count": 5230,
+                    "samples": 1000,
+                    "p50": 45.2,
+                    "p95": 310.7,
+                    "p99": 1250.4,
+                    "max": 2301.9
+                }]
+            }
+        """
+        #pylint:disable=unused-argument
+        latencies = get_latencies(self.app)
+        return Response(self.get_serializer({
+            'pid': os.getpid(),
+            'entry_points': latencies[ENTRY_POINT],
+            'rules': latencies[RULE]}).data)
+
+
 class RuleDetailAPIView(RuleMixin, RetrieveUpdateDestroyAPIView):
     """
     Retrieves an access rule
@@ -363,30 +595,24 @@ class RuleDetailAPIView(RuleMixin, RetrieveUpdateDestroyAPIView):
         #pylint:disable=useless-super-delegation
         return super(RuleDetailAPIView, self).delete(request, *args, **kwargs)
 
-    def perform_destroy(self, instance):
-        rank = instance.rank
-        with transaction.atomic():
-            instance.delete()
-            # compacts ranks
-            queryset = self.get_queryset()
-            queryset.filter(rank__gte=rank).update(
-                rank=F('rank') - 1, moved=True)
-            queryset.filter(moved=True).update(moved=False)
-
 
 class UserEngagementMixin(object):
 
     user_model = get_user_model()
 
     def get_queryset(self):
-        return self.user_model.objects.order_by(
-            '-last_login').prefetch_related('engagements')
+        return self.user_model.objects.order_by('-last_login')
 
 
-class UserEngagementAPIView(UserEngagementMixin, ListAPIView):
+class UserEngagementAPIView(KeysetPaginationMixin, UserEngagementMixin,
+                            ListAPIView):
     """
     Retrieves engagement metrics
 
+    Pass a `cursor` query parameter (empty for the first page) to page
+    through users by last login with the `next` links, without total count
+    unless a `count` query parameter is also present.
+
     **Tags: rbac, broker, appmodel
 
     **Examples
@@ -416,25 +642,162 @@ class UserEngagementAPIView(UserEngagementMixin, ListAPIView):
         }
     """
     serializer_class = UserEngagementSerializer
+    keyset_ordering = ('-last_login', '-pk')
+
+    @staticmethod
+    def decorate_users(users):
+        """
+        Sets the (stripped, non-blank) engagement tags of *users*
+        from a single query on (user, tag) tuples.
+        """
+        tags = {}
+        for user_id, slug in Engagement.objects.filter(
+                user__in=[user.pk for user in users]).values_list(
+                'user_id', 'slug').order_by('user_id', 'slug'):
+            slug = slug.strip()
+            if slug:
+                user_tags = tags.setdefault(user_id, [])
+                if slug not in user_tags:
+                    user_tags += [slug]
+        for user in users:
+            user.engagement_tags = tags.get(user.pk, [])
+        return users
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        users = self.decorate_users(
+            page if page is not None else list(queryset))
+        serializer = self.get_serializer(users, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
 
 
 
-class EngagementAPIView(AppMixin, GenericAPIView):
+class DateRangeMixin(object):
+    """
+    Date range and timezone from the query parameters.
+    """
+    @property
+    def timezone(self):
+        if not hasattr(self, '_timezone'):
+            self._timezone = parse_tz(self.request.GET.get('timezone'))
+            if not self._timezone:
+                self._timezone = timezone_or_utc()
+        return self._timezone
+
+    @staticmethod
+    def parse_datetime(value, tz_ob):
+        """
+        Returns *value* as an aware datetime, naive dates and times
+        being in timezone *tz_ob*.
+        """
+        if not value:
+            return None
+        at_time = parse_datetime(value)
+        if not at_time:
+            at_date = parse_date(value)
+            if not at_date:
+                raise serializers.ValidationError({'detail':
+                    "'%s' is not a valid date" % value})
+            at_time = datetime.datetime(
+                year=at_date.year, month=at_date.month, day=at_date.day)
+        if at_time.tzinfo is None:
+            if hasattr(tz_ob, 'localize'):
+                at_time = tz_ob.localize(at_time)
+            else:
+                at_time = at_time.replace(tzinfo=tz_ob)
+        return at_time
+
+    @property
+    def start_at(self):
+        if not hasattr(self, '_start_at'):
+            self._start_at = self.parse_datetime(
+                self.request.GET.get('start_at'), self.timezone)
+        return self._start_at
+
+    @property
+    def ends_at(self):
+        if not hasattr(self, '_ends_at'):
+            self._ends_at = self.parse_datetime(
+                self.request.GET.get('ends_at'), self.timezone)
+        return self._ends_at
+
+
+class EngagementAPIView(DateRangeMixin, AppMixin, GenericAPIView):
 
     serializer_class = EngagementsSerializer
     user_model = get_user_model()
 
+    @property
+    def has_rollups(self):
+        if not hasattr(self, '_has_rollups'):
+            self._has_rollups = ActivityRollup.objects.exists()
+        return self._has_rollups
+
+    def get_engagements(self, start_at=None, ends_at=None):
+        """
+        Returns the number of users that first engaged with each tag
+        in [*start_at*, *ends_at*[.
+        """
+        if self.has_rollups:
+            queryset = EngagementRollup.objects.all()
+            if start_at:
+                queryset = queryset.filter(period__gte=start_at)
+            if ends_at:
+                queryset = queryset.filter(period__lt=ends_at)
+            return queryset.values('slug').annotate(
+                count=Sum('count')).order_by('slug')
+        # `rules_engagement_rollup` never ran.
+        queryset = Engagement.objects.all()
+        if start_at:
+            queryset = queryset.filter(last_visited__gte=start_at)
+        if ends_at:
+            queryset = queryset.filter(last_visited__lt=ends_at)
+        # https://docs.djangoproject.com/en/2.2/topics/db/aggregation/
+        # #interaction-with-default-ordering-or-order-by
+        return queryset.values('slug').annotate(
+            count=Count('slug')).order_by('slug')
+
+    def get_active_users(self, start_at, ends_at):
+        """
+        Returns the number of users that last logged in
+        in [*start_at*, *ends_at*[ and the total number of users.
+        """
+        if self.has_rollups:
+            queryset = ActivityRollup.objects.all()
+            active_users = queryset.filter(period__gte=start_at,
+                period__lt=ends_at).aggregate(Sum('active_users')).get(
+                'active_users__sum') or 0
+            total_users = queryset.order_by('-period').values_list(
+                'total_users', flat=True).first()
+            return active_users, total_users
+        # `rules_engagement_rollup` never ran.
+        active_users = self.user_model.objects.filter(
+            last_login__gte=start_at, last_login__lt=ends_at).count()
+        return active_users, self.user_model.objects.count()
+
     def get(self, request, *args, **kwargs):
         """
         Retrieves users engagement
 
+        Engagements are counted for users that first engaged with a tag
+        in the [start_at, ends_at[ date range (all-time by default),
+        and active users for users that last logged in the same date range
+        (yesterday by default). Dates without a timezone are interpreted
+        in the `timezone` query parameter.
+
+        Counts are read from hourly rollups once the `rules_engagement_rollup`
+        command has run.
+
         **Tags: rbac, broker, appmodel
 
         **Examples
 
         .. code-block:: http
 
-            GET /api/proxy/engagement HTTP/1.1
+            GET /api/proxy/engagement?start_at=2026-01-01&timezone=UTC HTTP/1.1
 
         responds
 
@@ -447,35 +810,219 @@ class EngagementAPIView(AppMixin, GenericAPIView):
             }
         """
         #pylint:disable=unused-argument
-        # https://docs.djangoproject.com/en/2.2/topics/db/aggregation/
-        # #interaction-with-default-ordering-or-order-by
-        engs = Engagement.objects.values('slug').annotate(
-            count=Count('slug')).order_by('slug')
-        nb_users = self.user_model.objects.count()
+        tz_ob = self.timezone
+        start_at = self.start_at
+        ends_at = self.ends_at
+
+        # Engagements are counted since the beginning of time unless
+        # a date range is specified.
+        engs = self.get_engagements(start_at, ends_at)
+        # Active users are counted for yesterday unless a date range
+        # is specified.
+        if not ends_at:
+            ends_at = start_at + relativedelta(days=1) if start_at else None
+        if not ends_at:
+            today = datetime_or_now().astimezone(tz_ob)
+            ends_at = self.parse_datetime(today.strftime('%Y-%m-%d'), tz_ob)
+        if not start_at:
+            start_at = ends_at - relativedelta(days=1)
+        users, nb_users = self.get_active_users(start_at, ends_at)
+
         engagement_stats = []
         for eng in engs:
             engagement_stats += [{
                 'slug': eng['slug'],
-                'count': eng['count'] * 100 / nb_users
+                'count': eng['count'] * 100 / nb_users if nb_users else 0
             }]
-        # Compute number active users for yesterday
-        # XXX there should already be a function to compute that date range.
-        yest_dt = datetime_or_now() - relativedelta(days=1)
-        yest_start = datetime.datetime(year=yest_dt.year, month=yest_dt.month,
-            day=yest_dt.day)
-        yest_end = yest_start.replace(hour=23, minute=59, second=59,
-            # https://stackoverflow.com/a/34593058/1491475
-            microsecond=999999)
-        timezone = self.request.GET.get('timezone')
-        tz_ob = parse_tz(timezone)
-        if not tz_ob:
-            tz_ob = timezone_or_utc()
-        yest_start = yest_start.replace(tzinfo=tz_ob)
-        yest_end = yest_end.replace(tzinfo=tz_ob)
-        users = self.user_model.objects.filter(
-            last_login__gt=yest_start, last_login__lt=yest_end).count()
 
         return Response(self.get_serializer({
             'authentication': settings.AUTHENTICATION_OVERRIDE,
             'engagements': engagement_stats,
             'active_users': users}).data)
+
+
+class EngagementSeriesMixin(DateRangeMixin, AppMixin):
+    """
+    Loads engagement timestamps in bulk and bins them by period. Results
+    are cached per app, period and date range.
+    """
+    nb_periods = 30
+    user_model = get_user_model()
+
+    @property
+    def period(self):
+        if not hasattr(self, '_period'):
+            self._period = self.request.GET.get('period', 'day')
+            if self._period not in ('day', 'week'):
+                raise serializers.ValidationError({'detail':
+                    "period must be one of 'day' or 'week'"})
+        return self._period
+
+    @property
+    def period_starts(self):
+        if not hasattr(self, '_period_starts'):
+            step = relativedelta(days=7 if self.period == 'week' else 1)
+            ends_at = self.ends_at
+            if not ends_at:
+                ends_at = datetime_or_now().astimezone(self.timezone)
+            start_at = self.start_at
+            if not start_at:
+                start_at = ends_at - step * self.nb_periods
+            if start_at >= ends_at:
+                raise serializers.ValidationError({'detail':
+                    "start_at must be before ends_at"})
+            self._period_starts = get_period_starts(
+                start_at.astimezone(self.timezone), ends_at, self.period)
+        return self._period_starts
+
+    def get_cache_key(self):
+        return 'rules_%s_%s_%s_%s_%s' % (self.__class__.__name__,
+            self.app.pk, self.period, self.period_starts[0].isoformat(),
+            self.period_starts[-1].isoformat())
+
+    def get_results(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        #pylint:disable=unused-argument
+        cache_key = self.get_cache_key()
+        results = cache.get(cache_key)
+        count_cache('engagement_series', results is not None)
+        if results is None:
+            results = self.get_results()
+            cache.set(cache_key, results, settings.ENGAGEMENT_CACHE_TIMEOUT)
+        with override(self.timezone):
+            return Response(self.get_serializer({
+                'period': self.period,
+                'start_at': self.period_starts[0],
+                'ends_at': self.period_starts[-1],
+                'results': results}).data)
+
+
+class EngagementSeriesAPIView(EngagementSeriesMixin, GenericAPIView):
+    """
+    Retrieves first engagements time series
+
+    Returns, for each engagement tag, the number of users that first
+    engaged with the tag in each day (or week) of the [start_at, ends_at[
+    date range (last 30 periods by default).
+
+    Results are cached for ``ENGAGEMENT_CACHE_TIMEOUT`` seconds.
+
+    **Tags: rbac, broker, appmodel
+
+    **Examples
+
+    .. code-block:: http
+
+        GET /api/proxy/engagement/series?period=week&timezone=UTC HTTP/1.1
+
+    responds
+
+    .. code-block:: json
+
+        {
+            "period": "week",
+            "start_at": "2026-09-21T00:00:00Z",
+            "ends_at": "2026-10-05T00:00:00Z",
+            "results": [{
+                "slug": "app",
+                "values": [
+                    ["2026-09-21T00:00:00Z", 12],
+                    ["2026-09-28T00:00:00Z", 9]
+                ]
+            }]
+        }
+    """
+    serializer_class = EngagementSeriesListSerializer
+
+    def get_results(self):
+        period_starts = self.period_starts
+        timestamps_by_tag = {}
+        for slug, last_visited in Engagement.objects.filter(
+                last_visited__gte=period_starts[0],
+                last_visited__lt=period_starts[-1]).values_list(
+                'slug', 'last_visited').iterator():
+            slug = slug.strip()
+            if slug:
+                timestamps_by_tag.setdefault(slug, []).append(last_visited)
+        results = []
+        for slug in sorted(timestamps_by_tag):
+            results += [{'slug': slug, 'values': [list(item) for item in zip(
+                period_starts[:-1],
+                bin_by_period(period_starts, timestamps_by_tag[slug]))]}]
+        return results
+
+
+class EngagementCohortAPIView(EngagementSeriesMixin, GenericAPIView):
+    """
+    Retrieves cohort retention
+
+    Groups users by the day (or week) they first engaged with any tag
+    in the [start_at, ends_at[ date range (last 30 periods by default),
+    then counts, for each cohort, the users which were active (first
+    engaged with a tag or last logged in) 0, 1, 2, ... periods later.
+
+    Results are cached for ``ENGAGEMENT_CACHE_TIMEOUT`` seconds.
+
+    **Tags: rbac, broker, appmodel
+
+    **Examples
+
+    .. code-block:: http
+
+        GET /api/proxy/engagement/cohorts?period=week&timezone=UTC HTTP/1.1
+
+    responds
+
+    .. code-block:: json
+
+        {
+            "period": "week",
+            "start_at": "2026-09-21T00:00:00Z",
+            "ends_at": "2026-10-05T00:00:00Z",
+            "results": [{
+                "cohort": "2026-09-21T00:00:00Z",
+                "users": 12,
+                "retention": [12, 5]
+            }, {
+                "cohort": "2026-09-28T00:00:00Z",
+                "users": 9,
+                "retention": [9]
+            }]
+        }
+    """
+    serializer_class = EngagementCohortListSerializer
+
+    def get_results(self):
+        period_starts = self.period_starts
+        nb_periods = len(period_starts) - 1
+        cohorts = {}
+        for user_id, first_visited in Engagement.objects.values(
+                'user_id').annotate(first_visited=Min('last_visited')).filter(
+                first_visited__gte=period_starts[0],
+                first_visited__lt=period_starts[-1]).values_list(
+                'user_id', 'first_visited').iterator():
+            cohorts[user_id] = get_period_index(period_starts, first_visited)
+
+        active = {}
+        for user_id, at_time in itertools.chain(
+                Engagement.objects.filter(
+                    last_visited__gte=period_starts[0],
+                    last_visited__lt=period_starts[-1]).values_list(
+                    'user_id', 'last_visited').iterator(),
+                self.user_model.objects.filter(
+                    last_login__gte=period_starts[0],
+                    last_login__lt=period_starts[-1]).values_list(
+                    'pk', 'last_login').iterator()):
+            if user_id in cohorts:
+                active.setdefault(user_id, set([])).add(
+                    get_period_index(period_starts, at_time))
+
+        matrix = [[0] * (nb_periods - idx) for idx in range(nb_periods)]
+        for user_id, cohort_idx in six.iteritems(cohorts):
+            for period_idx in active.get(user_id, []):
+                if period_idx >= cohort_idx:
+                    matrix[cohort_idx][period_idx - cohort_idx] += 1
+        return [{'cohort': period_starts[idx], 'users': row[0],
+            'retention': row} for idx, row in enumerate(matrix)]
@@ -158,6 +158,37 @@ class RuleSerializer(serializers.ModelSerializer):
         return super(RuleSerializer, self).validate(attrs)
 
 
+class RuleSyncSerializer(RuleSerializer):
+    """
+    Access rule in a complete, ordered, list of access rules
+    """
+    class Meta(RuleSerializer.Meta):
+        fields = ('path', 'allow', 'is_forward', 'engaged')
+
+    @staticmethod
+    def validate_path(value):
+        if not value.startswith('/'):
+            value = '/' + value
+        return value
+
+
+class RuleListSyncSerializer(NoModelSerializer):
+
+    rules = RuleSyncSerializer(many=True,
+        help_text=_("Access rules in the order they should be considered"))
+
+    @staticmethod
+    def validate_rules(value):
+        paths = set([])
+        for rule in value:
+            if rule['path'] in paths:
+                raise serializers.ValidationError(
+                    _("Rule with path '%(path)s' appears more than once.") % {
+                    'path': rule['path']})
+            paths.add(rule['path'])
+        return value
+
+
 class RuleRankSerializer(NoModelSerializer):
 
     oldpos = serializers.IntegerField(
@@ -215,6 +246,8 @@ class UserEngagementSerializer(serializers.ModelSerializer):
 
     @staticmethod
     def get_engagements(obj):
+        if hasattr(obj, 'engagement_tags'):
+            return obj.engagement_tags
         engs = obj.engagements.all()
         user_tags = []
         for eng in engs:
@@ -249,6 +282,124 @@ class EngagementsSerializer(NoModelSerializer):
 " (enabled, login-only, disabled)"))
 
 
+class EngagementSeriesSerializer(NoModelSerializer):
+
+    slug = serializers.CharField(
+        help_text=_("Engagement tag"))
+    values = serializers.ListField(child=serializers.ListField(),
+        help_text=_("Start of each period and number of users that first"\
+" engaged with the tag during the period"))
+
+
+class EngagementSeriesListSerializer(NoModelSerializer):
+
+    period = serializers.CharField(
+        help_text=_("Length of periods (day or week)"))
+    start_at = serializers.DateTimeField(
+        help_text=_("Start of the first period"))
+    ends_at = serializers.DateTimeField(
+        help_text=_("End of the last period"))
+    results = EngagementSeriesSerializer(many=True,
+        help_text=_("Time series by engagement tag"))
+
+
+class EngagementCohortSerializer(NoModelSerializer):
+
+    cohort = serializers.DateTimeField(
+        help_text=_("Start of the period users first engaged in"))
+    users = serializers.IntegerField(
+        help_text=_("Number of users in the cohort"))
+    retention = serializers.ListField(child=serializers.IntegerField(),
+        help_text=_("Number of users in the cohort active 0, 1, 2, ..."\
+" periods after the cohort period"))
+
+
+class EngagementCohortListSerializer(NoModelSerializer):
+
+    period = serializers.CharField(
+        help_text=_("Length of periods (day or week)"))
+    start_at = serializers.DateTimeField(
+        help_text=_("Start of the first period"))
+    ends_at = serializers.DateTimeField(
+        help_text=_("End of the last period"))
+    results = EngagementCohortSerializer(many=True,
+        help_text=_("Retention by cohort"))
+
+
+class ExportJobSerializer(NoModelSerializer):
+
+    id = serializers.CharField(read_only=True,
+        help_text=_("Unique identifier for the export job"))
+    state = serializers.CharField(read_only=True,
+        help_text=_("State of the job (pending, running, done or failed)"))
+    format = serializers.ChoiceField(choices=('csv', 'ndjson'),
+        required=False, help_text=_("Format of the exported file"))
+    rows = serializers.IntegerField(read_only=True,
+        help_text=_("Number of rows written so far"))
+    size = serializers.IntegerField(read_only=True, required=False,
+        help_text=_("Size in bytes of the exported file"))
+    created_at = serializers.DateTimeField(read_only=True,
+        help_text=_("Date/time the job was created"))
+    updated_at = serializers.DateTimeField(read_only=True,
+        help_text=_("Date/time the job status was last updated"))
+    detail = serializers.CharField(read_only=True, required=False,
+        help_text=_("Describes the reason for a failure in plain text"))
+    location = serializers.URLField(read_only=True, required=False,
+        help_text=_("URL to download the exported file from"))
+
+
+class RuleStatSerializer(NoModelSerializer):
+
+    rank = serializers.IntegerField(read_only=True,
+        help_text=_("Determines the order in which rules are considered"))
+    path = serializers.CharField(read_only=True,
+        help_text=_("OpenAPI path against which requests are matched"))
+    hits = serializers.IntegerField(read_only=True,
+        help_text=_("Number of requests matched by the rule"))
+    denied = serializers.IntegerField(read_only=True,
+        help_text=_("Number of matched requests that were denied access"))
+    forwarded = serializers.IntegerField(read_only=True,
+        help_text=_("Number of matched requests that were forwarded"))
+    last_hit_at = serializers.DateTimeField(read_only=True,
+        help_text=_("Last time counters were saved with new hits"))
+    shadowed_by = serializers.SerializerMethodField(
+        help_text=_("Path of an earlier-ranked rule matching every path"\
+        " this rule matches, if any"))
+
+    def get_shadowed_by(self, obj):
+        shadowing = self.context.get('shadowed', {}).get(obj.pk)
+        return shadowing.path if shadowing is not None else None
+
+
+class LatencySerializer(NoModelSerializer):
+
+    key = serializers.CharField(read_only=True,
+        help_text=_("Entry point, or path of the rule, requests went through"))
+    count = serializers.IntegerField(read_only=True,
+        help_text=_("Number of requests since the worker started"))
+    samples = serializers.IntegerField(read_only=True,
+        help_text=_("Number of most recent requests percentiles"\
+        " are computed over"))
+    p50 = serializers.FloatField(read_only=True, allow_null=True,
+        help_text=_("Median duration of requests in milliseconds"))
+    p95 = serializers.FloatField(read_only=True, allow_null=True,
+        help_text=_("95th percentile duration of requests in milliseconds"))
+    p99 = serializers.FloatField(read_only=True, allow_null=True,
+        help_text=_("99th percentile duration of requests in milliseconds"))
+    max = serializers.FloatField(read_only=True, allow_null=True,
+        help_text=_("Longest duration of a request in milliseconds"))
+
+
+class LatencyStatsSerializer(NoModelSerializer):
+
+    pid = serializers.IntegerField(read_only=True,
+        help_text=_("Worker process that served the requests"))
+    entry_points = LatencySerializer(many=True, read_only=True,
+        help_text=_("Latencies of forwarded requests per entry point"))
+    rules = LatencySerializer(many=True, read_only=True,
+        help_text=_("Latencies of requests per matched rule"))
+
+
 class ValidationErrorSerializer(NoModelSerializer):
     """
     Details on why token is invalid.
@@ -77,6 +77,12 @@ except ImportError:
             return pytz.utc
 
 
+try:
+    from django.utils.choices import BaseChoiceIterator
+except ImportError: # django < 5.0
+    BaseChoiceIterator = object
+
+
 try:
     from django.utils.decorators import available_attrs
 except ImportError: # django < 3.0
@@ -96,6 +102,12 @@ except ImportError: # django < 1.8
     from django.db.models.loading import get_model
 
 
+try:
+    from asgiref.sync import iscoroutinefunction
+except ImportError: # asgiref < 3.6 (Django < 4.2)
+    from asyncio import iscoroutinefunction
+
+
 try:
     from django.utils.translation import gettext_lazy
 except ImportError: # django < 3.0
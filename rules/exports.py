@@ -0,0 +1,276 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Background export jobs.
+
+A job runs a download view (ex: ``UserEngagementCSVView``) outside
+of a web request and writes its rows to a file in ``settings.EXPORT_DIR``,
+next to a JSON file describing the status of the job. Jobs are run by
+a pool of ``settings.EXPORT_WORKERS`` threads in the web process, or,
+when ``EXPORT_WORKERS`` is 0, by the ``rules_export_worker`` command.
+
+A job is claimed by creating a lock file next to its status file, such
+that it runs once even when several threads and processes look for
+pending jobs. Result files are deleted ``settings.EXPORT_TTL`` seconds
+after the job completed (see ``delete_expired_jobs``).
+"""
+
+import datetime, json, logging, os, threading, uuid
+
+from django.db import connection
+from django.http import HttpRequest, QueryDict
+from django.utils.dateparse import parse_datetime
+from django.utils.module_loading import import_string
+
+from . import settings
+from .utils import JSONEncoder, datetime_or_now, get_app_model
+
+
+LOGGER = logging.getLogger(__name__)
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+EXPIRED = 'expired'
+
+# Rows written between two updates of the job status file.
+PROGRESS_ROWS = 10000
+
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_executor():
+    #pylint:disable=global-statement
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                #pylint:disable=import-outside-toplevel
+                from concurrent.futures import ThreadPoolExecutor
+                _EXECUTOR = ThreadPoolExecutor(
+                    max_workers=settings.EXPORT_WORKERS,
+                    thread_name_prefix='rules-export')
+    return _EXECUTOR
+
+
+def _get_status_path(job_id):
+    return os.path.join(settings.EXPORT_DIR, '%s.json' % job_id)
+
+
+def _get_lock_path(job_id):
+    return os.path.join(settings.EXPORT_DIR, '%s.lock' % job_id)
+
+
+def get_result_path(job):
+    return os.path.join(settings.EXPORT_DIR, job['filename'])
+
+
+def _save_job(job):
+    job['updated_at'] = datetime_or_now()
+    status_path = _get_status_path(job['id'])
+    with open(status_path + '.tmp', 'w', encoding='utf-8') as status_file:
+        json.dump(job, status_file, cls=JSONEncoder)
+    os.replace(status_path + '.tmp', status_path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _is_stale(job, at_time=None):
+    return settings.EXPORT_TTL is not None and (
+        parse_datetime(job['updated_at'])
+        + datetime.timedelta(seconds=settings.EXPORT_TTL)
+        < datetime_or_now(at_time))
+
+
+def is_expired(job, at_time=None):
+    """
+    Returns `True` when the result of *job* is, or is about to be,
+    deleted because it completed more than ``settings.EXPORT_TTL``
+    seconds ago.
+    """
+    if job['state'] == EXPIRED:
+        return True
+    return job['state'] in (DONE, FAILED) and _is_stale(job, at_time=at_time)
+
+
+def get_export_job(job_id):
+    """
+    Returns the status of export job *job_id* or `None` if it does not exist.
+    """
+    try:
+        uuid.UUID(job_id)
+    except (TypeError, ValueError):
+        return None
+    try:
+        with open(_get_status_path(job_id), encoding='utf-8') as status_file:
+            return json.load(status_file)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def get_pending_jobs():
+    if not os.path.isdir(settings.EXPORT_DIR):
+        return []
+    jobs = []
+    for filename in os.listdir(settings.EXPORT_DIR):
+        if filename.endswith('.json'):
+            job = get_export_job(filename[:-len('.json')])
+            if job and job['state'] == PENDING:
+                jobs += [job]
+    return sorted(jobs, key=lambda job: job['created_at'])
+
+
+def delete_expired_jobs(at_time=None):
+    """
+    Deletes the result files of jobs completed more than
+    ``settings.EXPORT_TTL`` seconds ago. Their status files, which report
+    the jobs as expired in the meantime, are deleted once another
+    ``EXPORT_TTL`` has passed.
+
+    Returns the number of jobs whose result file was deleted.
+    """
+    if settings.EXPORT_TTL is None or not os.path.isdir(settings.EXPORT_DIR):
+        return 0
+    at_time = datetime_or_now(at_time)
+    nb_expired = 0
+    for filename in os.listdir(settings.EXPORT_DIR):
+        if not filename.endswith('.json'):
+            continue
+        job = get_export_job(filename[:-len('.json')])
+        if not job or not is_expired(job, at_time=at_time):
+            continue
+        if job['state'] != EXPIRED:
+            _remove(get_result_path(job))
+            _remove(get_result_path(job) + '.partial')
+            _remove(_get_lock_path(job['id']))
+            job['state'] = EXPIRED
+            _save_job(job)
+            nb_expired += 1
+            LOGGER.info("expired export job %s", job['id'])
+        elif _is_stale(job, at_time=at_time):
+            _remove(_get_status_path(job['id']))
+    return nb_expired
+
+
+def create_export_job(view_class, app, query_params, export_format):
+    """
+    Records an export job of the rows produced by *view_class* for *app*
+    and schedules it on the thread pool.
+    """
+    if not os.path.isdir(settings.EXPORT_DIR):
+        os.makedirs(settings.EXPORT_DIR)
+    job_id = str(uuid.uuid4())
+    job = {
+        'id': job_id,
+        'state': PENDING,
+        'view': '%s.%s' % (view_class.__module__, view_class.__name__),
+        'app': app.pk,
+        'query': query_params.urlencode(),
+        'format': export_format,
+        'filename': '%s.%s' % (job_id, export_format),
+        'rows': 0,
+        'created_at': datetime_or_now(),
+    }
+    _save_job(job)
+    LOGGER.info("created export job %s of %s", job_id, job['view'])
+    if settings.EXPORT_WORKERS:
+        get_executor().submit(run_export_job, job_id)
+        get_executor().submit(delete_expired_jobs)
+    return get_export_job(job_id)
+
+
+def _claim_job(job_id):
+    """
+    Returns the status of export job *job_id*, marked as running, when
+    it is pending and no other thread or process claimed it first.
+    """
+    try:
+        os.close(os.open(_get_lock_path(job_id),
+            os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return None
+    job = get_export_job(job_id)
+    if job is None or job['state'] != PENDING:
+        return None
+    job['state'] = RUNNING
+    _save_job(job)
+    return job
+
+
+def run_export_job(job_id):
+    """
+    Writes the rows of export job *job_id* into its result file.
+    """
+    job = _claim_job(job_id)
+    if job is None:
+        return None
+    result_path = get_result_path(job)
+    try:
+        request = HttpRequest()
+        request.method = 'GET'
+        request.GET = QueryDict(job['query'])
+        view = import_string(job['view'])()
+        view.request = request
+        view.args = []
+        view.kwargs = {}
+        view._app = get_app_model().objects.get(pk=job['app']) #pylint:disable=protected-access
+        view._format = job['format'] #pylint:disable=protected-access
+        if job['format'] == view.NDJSON_FORMAT:
+            rows = view.get_ndjson_rows()
+            nb_headings = 0
+        else:
+            rows = view.get_rows()
+            nb_headings = 1
+        nb_lines = 0
+        with open(result_path + '.partial', 'w',
+                encoding='utf-8') as result_file:
+            for row in rows:
+                result_file.write(row)
+                nb_lines += 1
+                if nb_lines % PROGRESS_ROWS == 0:
+                    job['rows'] = nb_lines - nb_headings
+                    _save_job(job)
+        job['rows'] = max(nb_lines - nb_headings, 0)
+        os.replace(result_path + '.partial', result_path)
+        job['size'] = os.path.getsize(result_path)
+        job['state'] = DONE
+        LOGGER.info("completed export job %s (%d rows)", job_id, job['rows'])
+    except Exception as err: #pylint:disable=broad-except
+        LOGGER.exception("export job %s failed", job_id)
+        job['state'] = FAILED
+        job['detail'] = str(err)
+    finally:
+        # Jobs run in their own thread, with their own connection.
+        connection.close()
+    _save_job(job)
+    return job
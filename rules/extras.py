@@ -25,6 +25,7 @@
 from django.shortcuts import get_object_or_404
 
 from .compat import reverse, six
+from .timings import timed
 from .utils import get_app_model, get_current_app
 
 
@@ -41,7 +42,8 @@ class AppMixinBase(object):
                 self._app = get_object_or_404(get_app_model(),
                     slug=self.kwargs.get(self.app_url_kwarg))
             else:
-                self._app = get_current_app(self.request)
+                with timed(self.request, 'app'):
+                    self._app = get_current_app(self.request)
         return self._app
 
     def get_context_data(self, **kwargs):
@@ -56,6 +58,8 @@ class AppMixinBase(object):
             'rules':{
                'api_rules': reverse('rules_api_rule_list', kwargs=url_kwargs),
                'api_detail': reverse('rules_api_app_detail', kwargs=url_kwargs),
+               'api_rule_stats': reverse(
+                   'rules_api_rule_stats', kwargs=url_kwargs),
                'api_generate_key': reverse(
                    'rules_api_generate_key', kwargs=url_kwargs),
                'api_session_data': reverse(
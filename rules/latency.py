@@ -0,0 +1,157 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Slow-request log and rolling latency percentiles of proxied requests.
+
+A request is logged as a 'slow_request' event, with the duration of each
+stage (see ``rules.timings``), when one of the stages takes longer than
+its ``SLOW_REQUEST_THRESHOLDS``. The total durations of the last
+``LATENCY_WINDOW`` requests are kept in memory per entry point and per
+rule to compute percentiles. Windows are per process, i.e. each worker
+reports on the requests it served.
+"""
+
+import logging, math, threading
+from collections import deque
+
+from . import settings
+from .metrics import SLOW_REQUESTS
+from .timings import get_timer
+from .tracing import get_trace
+
+
+LOGGER = logging.getLogger(__name__)
+
+ENTRY_POINT = 'entry_point'
+RULE = 'rule'
+
+PERCENTILES = (50, 95, 99)
+
+_WINDOWS = {}
+_WINDOWS_LOCK = threading.Lock()
+
+
+class LatencyWindow(object):
+    """
+    Durations, in seconds, of the most recent requests.
+    """
+
+    def __init__(self, size):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, duration):
+        self.samples.append(duration)
+        self.count += 1
+
+    def as_dict(self):
+        """
+        Returns the number of requests seen and the percentiles,
+        in milliseconds, over the most recent ones.
+        """
+        samples = sorted(self.samples)
+        nb_samples = len(samples)
+        result = {'count': self.count, 'samples': nb_samples}
+        for percentile in PERCENTILES:
+            # nearest-rank
+            rank = max(int(math.ceil(percentile * nb_samples / 100.0)), 1)
+            result.update({'p%d' % percentile: round(
+                samples[rank - 1] * 1000, 3) if samples else None})
+        result.update({'max': round(samples[-1] * 1000, 3)
+            if samples else None})
+        return result
+
+
+def _add_sample(key, duration):
+    window = _WINDOWS.get(key)
+    if window is None or window.samples.maxlen != settings.LATENCY_WINDOW:
+        window = LatencyWindow(settings.LATENCY_WINDOW)
+        _WINDOWS[key] = window
+    window.add(duration)
+
+
+def get_response_size(response):
+    if response.streaming or not getattr(response, 'is_rendered', True):
+        size = response.get('Content-Length')
+        return int(size) if size and size.isdigit() else None
+    return len(response.content)
+
+
+def record_latency(request, response, rule=None, entry_point=None,
+                   upstream_status=None):
+    """
+    Adds the duration of *request* to the latency windows of *rule*,
+    the access rule it matched, and of *entry_point*, and logs *request*
+    if it is slow.
+    """
+    durations = get_timer(request).durations
+    total = durations.get('total')
+    if total is None:
+        return
+    if settings.LATENCY_WINDOW and rule is not None:
+        with _WINDOWS_LOCK:
+            _add_sample((rule.app_id, RULE, rule.path), total)
+            if entry_point:
+                _add_sample((rule.app_id, ENTRY_POINT, entry_point), total)
+
+    thresholds = settings.SLOW_REQUEST_THRESHOLDS
+    if not thresholds:
+        return
+    slow_stages = [stage for stage, threshold in thresholds.items()
+        if durations.get(stage, 0) > threshold]
+    if not slow_stages:
+        return
+    for stage in slow_stages:
+        SLOW_REQUESTS.inc(stage=stage)
+    timings = get_timer(request).as_dict()
+    LOGGER.warning("slow request \"%s %s\" (%s)", request.method,
+        request.path, ', '.join(["%s=%.3fms" % (stage, timings[stage])
+            for stage in slow_stages]), extra={
+        'event': 'slow_request', 'request': request,
+        'rule': rule.path if rule is not None else None,
+        'fwd_to': entry_point, 'upstream_status': upstream_status,
+        'status': response.status_code if response is not None else None,
+        'size': get_response_size(response) if response is not None else None,
+        'slow_stages': slow_stages, 'timings': timings,
+        'trace_id': get_trace(request).trace_id})
+
+
+def get_latencies(app):
+    """
+    Returns the latency percentiles per entry point and per rule
+    of requests to *app*.
+    """
+    results = {ENTRY_POINT: [], RULE: []}
+    with _WINDOWS_LOCK:
+        for key, window in list(_WINDOWS.items()):
+            app_id, kind, name = key
+            if app_id == app.pk:
+                item = window.as_dict()
+                item.update({'key': name})
+                results[kind] += [item]
+    for kind in results:
+        results[kind].sort(key=lambda item: item['key'])
+    return results
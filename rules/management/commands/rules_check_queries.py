@@ -0,0 +1,180 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Runs ``EXPLAIN`` on the hot queries of the rules application and fails
+when one of them is planned as a sequential scan of a table.
+
+On PostgreSQL, sequential scans are disabled while the queries are
+explained such that small tables do not hide a missing index.
+
+Since the rules application does not ship migrations, ``--create-indexes``
+adds the indexes declared on the rules models but missing from an existing
+database.
+"""
+
+import datetime, re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, models, transaction, DEFAULT_DB_ALIAS
+from django.db.models import Count, Q
+
+from ...models import ActivityRollup, Engagement, EngagementRollup, Rule
+from ...utils import datetime_or_now, get_app_model
+
+
+SEQ_SCAN_PATTERNS = {
+    # SQLite: "SCAN table" (versus "SCAN table USING [COVERING] INDEX ...")
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(\w+)(?! USING)(?!\w)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+
+
+def get_hot_queries():
+    """
+    Returns a list of (name, queryset, required) tuples. Queries on models
+    that are not managed by the rules application are not required to use
+    an index.
+    """
+    #pylint:disable=protected-access
+    app_model = get_app_model()
+    user_model = get_user_model()
+    app = app_model(pk=1)
+    ends_at = datetime_or_now()
+    start_at = ends_at - datetime.timedelta(days=1)
+    is_app_model_managed = (app_model._meta.app_label == Rule._meta.app_label)
+    return [
+        ('rules_by_rank',
+         Rule.objects.filter(app=app).order_by('rank'), True),
+        ('rules_by_path_prefix',
+         Rule.objects.filter(app=app, path__startswith='/api/').order_by(
+             'rank'), True),
+        ('app_by_path_prefix',
+         app_model.objects.filter(Q(path_prefix__isnull=True)
+             | Q(path_prefix='/app')).order_by('path_prefix', '-pk'),
+         is_app_model_managed),
+        ('engagements_by_slug',
+         Engagement.objects.values('slug').annotate(
+             count=Count('slug')).order_by('slug'), True),
+        ('engagements_by_last_visited',
+         Engagement.objects.filter(last_visited__gte=start_at,
+             last_visited__lt=ends_at).values('slug', 'last_visited'), True),
+        ('engagement_rollups_by_period',
+         EngagementRollup.objects.filter(period__gte=start_at,
+             period__lt=ends_at), True),
+        ('activity_rollups_by_period',
+         ActivityRollup.objects.filter(period__gte=start_at,
+             period__lt=ends_at), True),
+        ('users_by_last_login',
+         user_model.objects.filter(last_login__gte=start_at,
+             last_login__lt=ends_at).values('pk'), False),
+    ]
+
+
+def get_missing_indexes(connection, model):
+    """
+    Returns the indexes declared on *model* (`db_index` fields
+    and `Meta.indexes`) that are not in the database.
+    """
+    #pylint:disable=protected-access
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(
+            cursor, model._meta.db_table)
+    existing = set([tuple(constraint['columns'])
+        for constraint in constraints.values()
+        if constraint['index'] or constraint['unique']])
+    declared = list(model._meta.indexes)
+    for field in model._meta.local_fields:
+        if field.db_index and not field.unique:
+            index = models.Index(fields=[field.name])
+            index.set_name_with_model(model)
+            declared += [index]
+    missing = []
+    for index in declared:
+        columns = tuple([model._meta.get_field(field_name).column
+            for field_name in index.fields])
+        if columns not in existing:
+            missing += [index]
+    return missing
+
+
+class Command(BaseCommand):
+    help = "Checks hot queries are not planned as sequential scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', action='store',
+            dest='database', default=DEFAULT_DB_ALIAS,
+            help="database to run the checks against")
+        parser.add_argument('--create-indexes', action='store_true',
+            dest='create_indexes', default=False,
+            help="creates the indexes declared on models but missing"\
+                " from the database")
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if options['create_indexes']:
+            self.create_indexes(connection)
+
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if not pattern:
+            self.stdout.write("skipped: cannot check query plans on %s." %
+                connection.vendor)
+            return
+        failures = []
+        with transaction.atomic(using=options['database']):
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+            for name, queryset, required in get_hot_queries():
+                plan = queryset.using(options['database']).explain()
+                tables = pattern.findall(plan)
+                if not tables:
+                    status = "ok"
+                elif required:
+                    status = "FAIL (sequential scan of %s)" % ', '.join(tables)
+                    failures += [name]
+                else:
+                    status = "warning (sequential scan of %s)" % ', '.join(
+                        tables)
+                self.stdout.write("%s: %s" % (name, status))
+                if options['verbosity'] > 1:
+                    self.stdout.write(plan)
+            transaction.set_rollback(True)
+        if failures:
+            raise CommandError("sequential scans in %s" % ', '.join(failures))
+
+    def create_indexes(self, connection):
+        app_model = get_app_model()
+        managed_models = [Rule, Engagement, EngagementRollup, ActivityRollup]
+        #pylint:disable=protected-access
+        if app_model._meta.app_label == Rule._meta.app_label:
+            managed_models += [app_model]
+        with connection.schema_editor() as schema_editor:
+            for model in managed_models:
+                for index in get_missing_indexes(connection, model):
+                    schema_editor.add_index(model, index)
+                    self.stdout.write("created index %s on %s" % (
+                        index.name, model._meta.db_table))
@@ -0,0 +1,120 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Rolls up engagements and user activity into hourly counts
+read by the engagement API.
+
+This command is meant to run periodically (ex: hourly from cron).
+Engagement counts are also incremented as users first engage with a tag,
+while user activity only gets recorded by this command once an hour is over.
+
+Rebuilding engagement counts from the raw table, with ``--rebuild``
+or on the first run, loses the counts of engagements deleted by
+``rules_purge_engagements``. Once engagements were purged, ``--rebuild``
+is thus refused, and the first run does not rebuild, unless ``--force``
+is specified.
+"""
+
+import datetime, logging
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.functions import TruncHour
+
+from ...models import (ActivityRollup, Engagement, EngagementRollup,
+    PurgedEngagement, truncate_to_hour)
+from ...utils import datetime_or_now
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Rolls up engagements and user activity into hourly counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+            dest='rebuild', default=False,
+            help="recomputes engagement counts from the raw table")
+        parser.add_argument('--force', action='store_true',
+            dest='force', default=False,
+            help="rebuilds even though engagements were purged")
+
+    def handle(self, *args, **options):
+        user_model = get_user_model()
+        ends_at = truncate_to_hour(datetime_or_now())
+        with transaction.atomic():
+            last_period = ActivityRollup.objects.aggregate(
+                Max('period')).get('period__max')
+            rebuild = options['rebuild'] or not last_period
+            if (rebuild and not options['force'] and
+                PurgedEngagement.objects.exists()):
+                if options['rebuild']:
+                    raise CommandError("engagements were purged and their"\
+                        " counts would be lost by rebuilding engagement"\
+                        " rollups. Use --force to rebuild anyway.")
+                LOGGER.warning("engagements were purged, keeping engagement"\
+                    " rollups as they are on this first run.")
+                rebuild = False
+            if rebuild:
+                # Engagements recorded before the first run have
+                # not been counted incrementally.
+                EngagementRollup.objects.all().delete()
+                EngagementRollup.objects.bulk_create([
+                    EngagementRollup(period=row['period'], slug=row['slug'],
+                        count=row['count'])
+                    for row in Engagement.objects.annotate(
+                        period=TruncHour('last_visited',
+                            tzinfo=datetime.timezone.utc)).values(
+                        'period', 'slug').annotate(
+                        count=Count('user')).order_by('period', 'slug')])
+                self.stdout.write("rebuilt engagement rollups.")
+
+            total_users = user_model.objects.count()
+            users = user_model.objects.filter(last_login__lt=ends_at)
+            if last_period:
+                users = users.filter(
+                    last_login__gte=last_period + datetime.timedelta(hours=1))
+            activities = [
+                ActivityRollup(period=row['period'],
+                    active_users=row['active_users'], total_users=total_users)
+                for row in users.annotate(period=TruncHour('last_login',
+                    tzinfo=datetime.timezone.utc)).values('period').annotate(
+                    active_users=Count('pk')).order_by('period')]
+            last_hour = ends_at - datetime.timedelta(hours=1)
+            if ((not last_period or last_period < last_hour) and
+                (not activities or activities[-1].period < last_hour)):
+                # Always records the last hour such that the API picks
+                # an up-to-date total number of users.
+                activities += [ActivityRollup(
+                    period=last_hour, total_users=total_users)]
+            ActivityRollup.objects.bulk_create(activities)
+        LOGGER.info("rolled up user activity for %d hours until %s",
+            len(activities), ends_at.isoformat())
+        self.stdout.write("rolled up user activity for %d hours." %
+            len(activities))
@@ -0,0 +1,61 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Runs pending background export jobs.
+
+This command is used when ``EXPORT_WORKERS`` is 0 such that exports
+do not run inside web processes. It also deletes the files of jobs
+completed more than ``EXPORT_TTL`` seconds ago.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...exports import delete_expired_jobs, get_pending_jobs, run_export_job
+
+
+class Command(BaseCommand):
+    help = "Runs pending background export jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll', action='store', type=int,
+            dest='poll', default=0,
+            help="keeps running, checking for pending jobs every N seconds")
+
+    def handle(self, *args, **options):
+        while True:
+            nb_expired = delete_expired_jobs()
+            if nb_expired:
+                self.stdout.write("%d export jobs expired" % nb_expired)
+            for job in get_pending_jobs():
+                job = run_export_job(job['id'])
+                if job:
+                    self.stdout.write("%s: %s (%d rows)" % (
+                        job['id'], job['state'], job['rows']))
+            if not options['poll']:
+                break
+            time.sleep(options['poll'])
@@ -0,0 +1,127 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Prints a token for the ``X-Rules-Profile`` header, or aggregates
+the profiles of requests saved in ``PROFILE_DIR``.
+
+    $ curl -H "X-Rules-Profile: $(python manage.py rules_profile token)" ...
+    $ python manage.py rules_profile report --path /app/ --sort tottime
+"""
+
+import datetime, io, json, os, pstats
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import settings
+from ...profiling import make_profile_token
+from ...utils import datetime_or_now
+
+
+class Command(BaseCommand):
+    help = "Creates profile tokens and reports on profiled requests."
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=('token', 'report'),
+            help="print a profile token, or report on saved profiles")
+        parser.add_argument('--path', action='store', dest='path',
+            default=None, help="only requests whose path starts with PATH")
+        parser.add_argument('--since', action='store', type=int,
+            dest='since', default=None,
+            help="only requests profiled in the last SINCE minutes")
+        parser.add_argument('--sort', action='store', dest='sort',
+            default='cumulative', help="sort key for the report")
+        parser.add_argument('--limit', action='store', type=int,
+            dest='limit', default=30, help="number of functions listed")
+        parser.add_argument('--output', action='store', dest='output',
+            default=None, help="saves the aggregated stats in OUTPUT")
+        parser.add_argument('--clear', action='store_true', dest='clear',
+            default=False, help="deletes the profiles reported on")
+
+    def handle(self, *args, **options):
+        if options['action'] == 'token':
+            self.stdout.write(make_profile_token())
+            return
+
+        profiles = self.get_profiles(path=options['path'],
+            since=options['since'])
+        if not profiles:
+            raise CommandError("no profiles found in %s." %
+                settings.PROFILE_DIR)
+        # `pstats` prints piecemeal, which `self.stdout` would break
+        # into separate lines.
+        output = io.StringIO()
+        stats = pstats.Stats(profiles[0][0], stream=output)
+        for prof_path, _ in profiles[1:]:
+            stats.add(prof_path)
+        durations = sorted([meta.get('duration') or 0
+            for _, meta in profiles])
+        self.stdout.write("%d requests, median %.3fms, max %.3fms" % (
+            len(durations), durations[len(durations) // 2], durations[-1]))
+        try:
+            stats.strip_dirs().sort_stats(options['sort'])
+        except KeyError:
+            raise CommandError("invalid sort key '%s'." % options['sort'])
+        stats.print_stats(options['limit'])
+        self.stdout.write(output.getvalue())
+        if options['output']:
+            stats.dump_stats(options['output'])
+            self.stdout.write("aggregated stats saved in %s" %
+                options['output'])
+        if options['clear']:
+            for prof_path, _ in profiles:
+                for file_path in (prof_path,
+                        os.path.splitext(prof_path)[0] + '.json'):
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+
+    @staticmethod
+    def get_profiles(path=None, since=None):
+        """
+        Returns a list of tuples (.prof file, request description).
+        """
+        results = []
+        if not os.path.isdir(settings.PROFILE_DIR):
+            return results
+        if since:
+            since = (datetime_or_now() -
+                datetime.timedelta(minutes=since)).timestamp()
+        for filename in sorted(os.listdir(settings.PROFILE_DIR)):
+            if not filename.endswith('.prof'):
+                continue
+            prof_path = os.path.join(settings.PROFILE_DIR, filename)
+            meta = {}
+            try:
+                with open(os.path.splitext(prof_path)[0] + '.json') \
+                    as meta_file:
+                    meta = json.load(meta_file)
+            except (OSError, ValueError):
+                pass
+            if path and not meta.get('path', '').startswith(path):
+                continue
+            if since and os.path.getmtime(prof_path) < since:
+                continue
+            results += [(prof_path, meta)]
+        return results
@@ -0,0 +1,163 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Deletes the engagements of users who have not logged in during
+the retention period (``ENGAGEMENT_RETENTION``), optionally archiving
+the rows deleted. Engagements of users who never logged in are deleted
+when they were recorded before the retention period.
+
+``Engagement.last_visited`` is the time a user first engaged with a tag,
+so it cannot tell whether the user is still active. The tags purged
+for each user are kept in ``PurgedEngagement`` such that engaging
+with them again is not counted twice in ``EngagementRollup``.
+
+Rows are deleted in small chunks ordered by primary key, each chunk
+in its own transaction, with a pause in between such that locks are held
+briefly and replicas keep up.
+
+Counts already rolled up by ``rules_engagement_rollup`` are kept,
+so run it before purging. Afterwards, it refuses to ``--rebuild``
+unless ``--force`` is specified.
+"""
+
+import datetime, gzip, json, logging, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from ... import settings
+from ...models import Engagement, PurgedEngagement
+from ...utils import JSONEncoder, datetime_or_now
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Deletes engagements of inactive users in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', action='store', type=int,
+            dest='retention_days', default=settings.ENGAGEMENT_RETENTION,
+            help="overrides the ENGAGEMENT_RETENTION setting")
+        parser.add_argument('--chunk-size', action='store', type=int,
+            dest='chunk_size', default=1000,
+            help="number of rows deleted in each transaction")
+        parser.add_argument('--sleep', action='store', type=float,
+            dest='sleep', default=0.1,
+            help="seconds to pause between two chunks")
+        parser.add_argument('--archive', action='store', dest='archive',
+            default=None,
+            help="appends deleted rows as NDJSON to a file (gzip if .gz)")
+        parser.add_argument('--dry-run', action='store_true',
+            dest='dry_run', default=False,
+            help="counts the rows that would be deleted")
+
+    def handle(self, *args, **options):
+        if options['retention_days'] is None:
+            raise CommandError("ENGAGEMENT_RETENTION is not set"\
+                " and --retention-days was not specified.")
+        now = datetime_or_now()
+        ends_at = now - datetime.timedelta(days=options['retention_days'])
+        inactive = (Q(user__last_login__lt=ends_at) |
+            Q(user__last_login__isnull=True, last_visited__lt=ends_at))
+        queryset = Engagement.objects.filter(inactive)
+        if options['dry_run']:
+            self.stdout.write("%d engagements of users inactive since %s." % (
+                queryset.count(), ends_at.isoformat()))
+            return
+
+        archive = None
+        if options['archive']:
+            if options['archive'].endswith('.gz'):
+                archive = gzip.open(options['archive'], 'at')
+            else:
+                archive = open(options['archive'], 'a')
+        nb_deleted = 0
+        last_pk = None
+        try:
+            while True:
+                chunk = queryset.order_by('pk')
+                if last_pk is not None:
+                    chunk = chunk.filter(pk__gt=last_pk)
+                chunk = list(chunk.values_list('pk', flat=True)[
+                    :options['chunk_size']])
+                if not chunk:
+                    break
+                last_pk = chunk[-1]
+                with transaction.atomic():
+                    # Users who logged in since the chunk was read
+                    # keep their engagements.
+                    deleted = list(Engagement.objects.filter(inactive,
+                        pk__in=chunk).values(
+                        'pk', 'slug', 'user_id', 'last_visited'))
+                    self.add_purged(deleted, now)
+                    nb_deleted += Engagement.objects.filter(
+                        pk__in=[row['pk'] for row in deleted]).delete()[0]
+                if archive:
+                    # Only rows actually deleted, once they are.
+                    for row in deleted:
+                        archive.write(json.dumps(row, cls=JSONEncoder) + '\n')
+                    archive.flush()
+                if len(chunk) < options['chunk_size']:
+                    break
+                if options['sleep']:
+                    time.sleep(options['sleep'])
+        finally:
+            if archive:
+                archive.close()
+        LOGGER.info("purged %d engagements of users inactive since %s",
+            nb_deleted, ends_at.isoformat())
+        self.stdout.write("purged %d engagements of users inactive since %s."
+            % (nb_deleted, ends_at.isoformat()))
+
+    @staticmethod
+    def add_purged(deleted, purged_at):
+        """
+        Adds the tags of *deleted* engagements, a list of dictionnaries
+        with ``user_id`` and ``slug`` keys, to the ``PurgedEngagement``
+        of each user.
+        """
+        slugs = {}
+        for row in deleted:
+            slugs.setdefault(row['user_id'], set([])).add(row['slug'])
+        purged = {item.user_id: item for item in
+            PurgedEngagement.objects.select_for_update().filter(
+            user_id__in=list(slugs))}
+        created = []
+        for user_id, user_slugs in slugs.items():
+            item = purged.get(user_id)
+            if item is None:
+                created += [PurgedEngagement(user_id=user_id,
+                    slugs=','.join(sorted(user_slugs)), purged_at=purged_at)]
+            else:
+                item.slugs = ','.join(sorted(
+                    set(item.slugs.split(',')) | user_slugs))
+                item.purged_at = purged_at
+        PurgedEngagement.objects.bulk_create(created)
+        PurgedEngagement.objects.bulk_update(list(purged.values()),
+            ['slugs', 'purged_at'])
@@ -0,0 +1,338 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Replays access logs through the access rules of an app, offline,
+and reports throughput, hits per rule, unmatched paths and, when
+a second rules table is specified, the requests whose decision changes.
+
+Access logs are read either as NDJSON records with ``path``, ``method``
+and ``user`` keys, as Common/Combined Log Format lines, or as
+"METHOD PATH [USER]" lines. Files ending in .gz are decompressed.
+
+Decisions follow ``check_matched``, except that permission operators
+(``RULE_OPERATORS``) are not called. They are assumed to grant access
+to authenticated users unless ``--operators deny`` is specified.
+Engagements are not recorded.
+
+The second rules table (``--compare``) is either the slug of another app
+or a JSON file listing rules in the format accepted by the rules sync API,
+i.e. ``path``, ``allow``, ``is_forward`` and ``engaged`` for each rule
+(ex: edits about to be applied, or the output of the rules list API).
+"""
+
+import gzip, json, os, re, sys, time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import settings
+from ...api.serializers import RuleListSyncSerializer
+from ...models import Rule
+from ...perms import match_rules
+from ...utils import get_app_model, get_current_app
+
+
+CLF_RE = re.compile(
+    r'^\S+ \S+ (?P<user>\S+) \[[^\]]*\] "(?P<method>[A-Z]+) (?P<path>\S+)')
+
+UNMATCHED = 'unmatched'
+
+
+def parse_line(line):
+    """
+    Returns a tuple (method, path, user) for an access log *line*,
+    or ``None`` if it cannot be parsed. *user* is ``None`` for anonymous
+    requests.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith('{'):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        method = record.get('method', 'GET')
+        path = record.get('path')
+        user = record.get('user') or record.get('username')
+    else:
+        look = CLF_RE.match(line)
+        if look:
+            method, path, user = look.group('method', 'path', 'user')
+        else:
+            fields = line.split()
+            if len(fields) < 2:
+                return None
+            method, path = fields[0], fields[1]
+            user = fields[2] if len(fields) > 2 else None
+    if not path:
+        return None
+    if user in ('-', ''):
+        user = None
+    # Rules are matched against the path only.
+    path = path.split('?', 1)[0]
+    return (method.upper(), path, user)
+
+
+def decide(rule, method, is_authenticated, operators_grant=True):
+    """
+    Returns the decision ``check_matched`` (or ``options`` for preflight
+    requests) would take for a request matching *rule*.
+    """
+    if rule is None:
+        return UNMATCHED
+    outcome = 'forward' if rule.is_forward else 'local'
+    if method == 'OPTIONS' or rule.rule_op == Rule.ANY:
+        return outcome
+    if not is_authenticated:
+        return 'login'
+    if not operators_grant:
+        return 'denied'
+    return outcome
+
+
+def get_operator_name(rule):
+    if rule is None:
+        return ''
+    try:
+        return settings.RULE_OPERATORS[rule.rule_op][0]
+    except IndexError:
+        return str(rule.rule_op)
+
+
+class RulesTable(object):
+    """
+    Access rules of an app loaded in memory together with hit counts.
+    """
+
+    def __init__(self, name, rules):
+        self.name = name
+        self.rules = rules
+        self.hits = Counter()
+
+    def match(self, path):
+        return match_rules(self.rules, path)[0]
+
+
+class Command(BaseCommand):
+    help = "Replays access logs through access rules and reports decisions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('logs', nargs='*', default=['-'],
+            help="access log files (default: stdin)")
+        parser.add_argument('--app', action='store', dest='app',
+            default=None, help="slug of the app (default: current app)")
+        parser.add_argument('--compare', action='store', dest='compare',
+            default=None,
+            help="slug of an app, or JSON file of rules, to diff against")
+        parser.add_argument('--operators', action='store', dest='operators',
+            choices=('allow', 'deny'), default='allow',
+            help="outcome of permission operators for authenticated users")
+        parser.add_argument('--batch-size', action='store', type=int,
+            dest='batch_size', default=10000,
+            help="number of log lines deduplicated and matched together")
+        parser.add_argument('--top', action='store', type=int,
+            dest='top', default=20,
+            help="number of unmatched paths and diffs listed")
+        parser.add_argument('--json', action='store_true', dest='json',
+            default=False, help="prints the report as JSON")
+
+    def handle(self, *args, **options):
+        #pylint:disable=too-many-locals
+        app = self.get_app(options['app'])
+        tables = [RulesTable(str(app), list(Rule.objects.get_rules(app)))]
+        if options['compare']:
+            tables += [self.get_compare_table(options['compare'], app)]
+        operators_grant = (options['operators'] == 'allow')
+
+        nb_lines = 0
+        nb_skipped = 0
+        nb_unique = 0
+        decisions = [Counter() for _ in tables]
+        unmatched = [Counter() for _ in tables]
+        diffs = Counter()
+        diff_examples = {}
+        match_seconds = 0
+        started_at = time.perf_counter()
+        for batch in self.read_batches(options['logs'], options['batch_size']):
+            entries = Counter()
+            for line in batch:
+                nb_lines += 1
+                entry = parse_line(line)
+                if entry is None:
+                    nb_skipped += 1
+                    continue
+                method, path, user = entry
+                entries[(method, path, user is not None)] += 1
+            nb_unique += len(entries)
+            start = time.perf_counter()
+            matched = {}
+            for path in set([key[1] for key in entries]):
+                matched[path] = [table.match(path) for table in tables]
+            match_seconds += time.perf_counter() - start
+            for key, count in entries.items():
+                method, path, is_authenticated = key
+                results = []
+                for idx, table in enumerate(tables):
+                    rule = matched[path][idx]
+                    decision = decide(rule, method, is_authenticated,
+                        operators_grant=operators_grant)
+                    decisions[idx][decision] += count
+                    if rule is None:
+                        unmatched[idx][path] += count
+                    else:
+                        table.hits[rule.path] += count
+                    results += [(decision, get_operator_name(rule))]
+                if len(results) > 1 and results[0] != results[1]:
+                    diff = tuple(['%s (%s)' % result if result[1]
+                        else result[0] for result in results])
+                    diffs[diff] += count
+                    diff_examples.setdefault(diff, Counter())[
+                        '%s %s%s' % (method, path,
+                        '' if is_authenticated else ' (anonymous)')] += count
+        elapsed = time.perf_counter() - started_at
+
+        nb_entries = nb_lines - nb_skipped
+        report = {
+            'lines': nb_lines,
+            'skipped': nb_skipped,
+            'unique': nb_unique,
+            'seconds': round(elapsed, 3),
+            'requests_per_sec': round(nb_entries / elapsed, 1)
+                if elapsed else None,
+            'matches_per_sec': round(nb_unique / match_seconds, 1)
+                if match_seconds else None,
+            'tables': [{
+                'name': table.name,
+                'decisions': dict(decisions[idx]),
+                'hits': [{'path': rule.path, 'rank': rule.rank,
+                    'hits': table.hits.get(rule.path, 0)}
+                    for rule in table.rules],
+                'unmatched': [{'path': path, 'count': count}
+                    for path, count in unmatched[idx].most_common(
+                        options['top'])],
+            } for idx, table in enumerate(tables)],
+        }
+        if len(tables) > 1:
+            report['diffs'] = [{
+                'from': diff[0], 'to': diff[1], 'count': count,
+                'examples': [{'request': request, 'count': example_count}
+                    for request, example_count in diff_examples[
+                        diff].most_common(5)]}
+                for diff, count in diffs.most_common(options['top'])]
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.write_report(report)
+
+    @staticmethod
+    def get_app(slug):
+        if not slug:
+            app = get_current_app()
+            if app is None:
+                raise CommandError("no current app.")
+            return app
+        app_model = get_app_model()
+        try:
+            return app_model.objects.get(slug=slug)
+        except app_model.DoesNotExist:
+            raise CommandError("app '%s' does not exist." % slug)
+
+    def get_compare_table(self, compare, app):
+        if not os.path.exists(compare):
+            compare_app = self.get_app(compare)
+            return RulesTable(str(compare_app),
+                list(Rule.objects.get_rules(compare_app)))
+        with open(compare) as declared_file:
+            declared = json.load(declared_file)
+        if isinstance(declared, dict):
+            # As returned by the rules list API.
+            declared = declared.get('results', [])
+        # Parses rules the same way the sync API does such that ``allow``
+        # is converted to ``rule_op`` and ``kwargs``.
+        serializer = RuleListSyncSerializer(data={'rules': declared})
+        if not serializer.is_valid():
+            raise CommandError("%s: %s" % (compare, serializer.errors))
+        rules = []
+        for rank, item in enumerate(serializer.validated_data['rules']):
+            rule = Rule(app=app, path=item['path'], rank=rank)
+            for field_name in Rule.SYNC_FIELDS:
+                if field_name in item:
+                    setattr(rule, field_name, item[field_name])
+            rules += [rule]
+        return RulesTable(compare, rules)
+
+    @staticmethod
+    def read_batches(logs, batch_size):
+        batch = []
+        for log in logs:
+            if log == '-':
+                log_file = sys.stdin
+            elif log.endswith('.gz'):
+                log_file = gzip.open(log, 'rt')
+            else:
+                log_file = open(log)
+            try:
+                for line in log_file:
+                    batch += [line]
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+            finally:
+                if log_file is not sys.stdin:
+                    log_file.close()
+        if batch:
+            yield batch
+
+    def write_report(self, report):
+        self.stdout.write("%d lines (%d skipped, %d unique requests)"\
+            " in %.3fs: %s requests/s, %s matches/s" % (
+            report['lines'], report['skipped'], report['unique'],
+            report['seconds'], report['requests_per_sec'],
+            report['matches_per_sec']))
+        for table in report['tables']:
+            self.stdout.write("\n%s" % table['name'])
+            self.stdout.write("  decisions: %s" % ', '.join([
+                "%s=%d" % item for item in sorted(table['decisions'].items())]))
+            self.stdout.write("  hits per rule:")
+            for hit in table['hits']:
+                self.stdout.write("    %8d  %s" % (hit['hits'], hit['path']))
+            if table['unmatched']:
+                self.stdout.write("  unmatched paths:")
+                for item in table['unmatched']:
+                    self.stdout.write("    %8d  %s" % (
+                        item['count'], item['path']))
+        if 'diffs' in report:
+            self.stdout.write("\ndecision changes:")
+            if not report['diffs']:
+                self.stdout.write("  none")
+            for diff in report['diffs']:
+                self.stdout.write("  %8d  %s -> %s" % (
+                    diff['count'], diff['from'], diff['to']))
+                for example in diff['examples']:
+                    self.stdout.write("            %8d  %s" % (
+                        example['count'], example['request']))
@@ -0,0 +1,320 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+In-process metrics registry, rendered in the Prometheus text exposition
+format by ``rules.views.metrics.MetricsView``.
+
+When ``METRICS_DIR`` is set, each process (ex: gunicorn worker) writes
+its values to its own file in that directory at most every
+`WRITE_INTERVAL` seconds, and at exit. Files are merged when metrics
+are scraped: counters and histograms are summed over all files,
+gauges over the files of processes still running. Counters of processes
+that exited are kept so totals never decrease; clear the directory
+when the whole server restarts.
+"""
+
+import atexit, json, logging, os, threading, time
+
+from . import settings
+
+
+LOGGER = logging.getLogger(__name__)
+
+WRITE_INTERVAL = 5
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0)
+
+
+class Metric(object):
+
+    metric_type = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def get_key(self, labels):
+        return tuple([str(labels.get(name, '')) for name in self.labelnames])
+
+    def dump(self):
+        return [[list(key), value] for key, value in self.values.items()]
+
+
+class Counter(Metric):
+
+    metric_type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.get_key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.maybe_write()
+
+
+class Gauge(Metric):
+
+    metric_type = 'gauge'
+
+    def set(self, value, **labels):
+        key = self.get_key(labels)
+        with self.registry.lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+
+    metric_type = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super(Histogram, self).__init__(
+            registry, name, documentation, labelnames=labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self.get_key(labels)
+        with self.registry.lock:
+            # Counts per bucket (not cumulative), +Inf, then sum.
+            values = self.values.get(key)
+            if values is None:
+                values = [0] * (len(self.buckets) + 2)
+                self.values[key] = values
+            idx = 0
+            while idx < len(self.buckets) and value > self.buckets[idx]:
+                idx += 1
+            values[idx] += 1
+            values[-1] += value
+        self.registry.maybe_write()
+
+
+class Registry(object):
+    """
+    Metrics of the current process. Values are shared with other processes
+    through ``METRICS_DIR`` only when *multiprocess* is true.
+    """
+
+    def __init__(self, multiprocess=True):
+        self.multiprocess = multiprocess
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.callbacks = []
+        self.written_at = time.monotonic()
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(),
+                  buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(self, name, documentation,
+            labelnames, buckets=buckets))
+
+    def register_callback(self, callback):
+        """
+        Registers *callback* to be called before metrics are dumped,
+        typically to set gauges.
+        """
+        self.callbacks.append(callback)
+
+    def dump(self):
+        for callback in self.callbacks:
+            callback()
+        with self.lock:
+            return {'pid': os.getpid(), 'metrics': {
+                name: {'type': metric.metric_type,
+                    'help': metric.documentation,
+                    'labels': list(metric.labelnames),
+                    'buckets': list(getattr(metric, 'buckets', [])),
+                    'values': metric.dump()}
+                for name, metric in self.metrics.items()}}
+
+    @staticmethod
+    def get_path(pid):
+        return os.path.join(settings.METRICS_DIR, 'metrics-%d.json' % pid)
+
+    @property
+    def is_shared(self):
+        return self.multiprocess and bool(settings.METRICS_DIR)
+
+    def maybe_write(self):
+        if (self.is_shared and
+            time.monotonic() - self.written_at >= WRITE_INTERVAL):
+            self.write()
+
+    def write(self):
+        self.written_at = time.monotonic()
+        if not os.path.isdir(settings.METRICS_DIR):
+            os.makedirs(settings.METRICS_DIR)
+        path = self.get_path(os.getpid())
+        tmp_path = '%s.%d.tmp' % (path, threading.get_ident())
+        with open(tmp_path, 'w') as dump_file:
+            json.dump(self.dump(), dump_file)
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        """
+        Returns the metrics of all processes merged together.
+        """
+        if not self.is_shared:
+            return self.dump()['metrics']
+        self.write()
+        merged = {}
+        for filename in sorted(os.listdir(settings.METRICS_DIR)):
+            if not (filename.startswith('metrics-') and
+                    filename.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(settings.METRICS_DIR, filename)) \
+                    as dump_file:
+                    dump = json.load(dump_file)
+            except (OSError, ValueError) as err:
+                LOGGER.warning("skipping metrics file %s: %s", filename, err)
+                continue
+            is_alive = _is_alive(dump.get('pid'))
+            for name, metric in dump['metrics'].items():
+                if metric['type'] == 'gauge' and not is_alive:
+                    continue
+                merged_metric = merged.setdefault(name, dict(metric,
+                    values=[]))
+                values = {tuple(key): value
+                    for key, value in merged_metric['values']}
+                for key, value in metric['values']:
+                    key = tuple(key)
+                    if key not in values:
+                        values[key] = value
+                    elif isinstance(value, list):
+                        values[key] = [left + right
+                            for left, right in zip(values[key], value)]
+                    else:
+                        values[key] += value
+                merged_metric['values'] = [[list(key), value]
+                    for key, value in values.items()]
+        return merged
+
+    def render(self):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        for name, metric in sorted(self.collect().items()):
+            lines += ['# HELP %s %s' % (name, metric['help']),
+                '# TYPE %s %s' % (name, metric['type'])]
+            for key, value in sorted(metric['values']):
+                labels = list(zip(metric['labels'], key))
+                if metric['type'] != 'histogram':
+                    lines += ['%s%s %s' % (name, _format_labels(labels),
+                        _format_value(value))]
+                    continue
+                cumulative = 0
+                for bound, count in zip(
+                        metric['buckets'] + ['+Inf'], value[:-1]):
+                    cumulative += count
+                    lines += ['%s_bucket%s %d' % (name, _format_labels(
+                        labels + [('le', str(bound))]), cumulative)]
+                lines += ['%s_sum%s %s' % (name, _format_labels(labels),
+                    _format_value(value[-1]))]
+                lines += ['%s_count%s %d' % (name, _format_labels(labels),
+                    cumulative)]
+        return '\n'.join(lines) + '\n'
+
+
+def _is_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{%s}' % ','.join(['%s="%s"' % (name, value.replace(
+        '\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels])
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.counter('rules_requests_total',
+    "Requests checked against access rules.", ('app', 'rule', 'decision'))
+UPSTREAM_DURATION = REGISTRY.histogram(
+    'rules_upstream_request_duration_seconds',
+    "Time spent waiting for responses from upstream entry points.",
+    ('entry_point',))
+UPSTREAM_ERRORS = REGISTRY.counter('rules_upstream_errors_total',
+    "Requests to upstream entry points that failed.", ('entry_point', 'error'))
+CACHE_REQUESTS = REGISTRY.counter('rules_cache_requests_total',
+    "Lookups in caches, by result (hit or miss).", ('cache', 'result'))
+RULE_STATS_PENDING = REGISTRY.gauge('rules_rule_stats_pending',
+    "Rules whose hit counters are waiting to be saved.")
+SLOW_REQUESTS = REGISTRY.counter('rules_slow_requests_total',
+    "Proxied requests over a `SLOW_REQUEST_THRESHOLDS` stage duration.",
+    ('stage',))
+
+
+def count_request(app, rule, decision):
+    """
+    Counts a request to *app* matched by *rule* (``None`` if no rule
+    matched) with *decision* (forward, local, denied or unmatched).
+    """
+    REQUESTS.inc(app=app.slug if app is not None else '',
+        rule=rule.path if rule is not None else '', decision=decision)
+
+
+def count_cache(cache_name, hit):
+    CACHE_REQUESTS.inc(cache=cache_name, result='hit' if hit else 'miss')
+
+
+@atexit.register
+def _write_on_exit():
+    if REGISTRY.is_shared:
+        try:
+            REGISTRY.write()
+        except OSError as err:
+            LOGGER.warning("could not write metrics on exit: %s", err)
@@ -30,8 +30,10 @@ from django.utils.cache import patch_vary_headers
 from rest_framework.authentication import get_authorization_header
 from rest_framework.views import APIView
 
-from .compat import six
+from .compat import iscoroutinefunction, six
 from .perms import find_rule
+from .profiling import profile_request
+from .timings import add_server_timing, get_timer, timed
 from .utils import get_current_app
 
 
@@ -56,6 +58,19 @@ class RulesMiddleware(CsrfViewMiddleware):
     sent along by browser (CORS).
     """
 
+    def __init__(self, get_response=None):
+        super(RulesMiddleware, self).__init__(get_response)
+        # In async mode, `__call__` returns a coroutine, not a response.
+        self.is_async = bool(get_response) and iscoroutinefunction(
+            get_response)
+
+    def __call__(self, request):
+        if self.is_async:
+            return super(RulesMiddleware, self).__call__(request)
+        # Profiles on demand the rest of the middleware chain and the view.
+        return profile_request(request,
+            super(RulesMiddleware, self).__call__, request)
+
     @staticmethod
     def patch_set_cookies(response, domain):
         if not response.cookies:
@@ -66,7 +81,8 @@ class RulesMiddleware(CsrfViewMiddleware):
     def process_view(self, request, callback, callback_args, callback_kwargs):
         view_class = getattr(callback, 'view_class', None)
         if hasattr(view_class, 'conditional_forward'):
-            app = get_current_app(request)
+            with timed(request, 'app'):
+                app = get_current_app(request)
             request.matched_rule, request.matched_params = find_rule(
                 request, app)
             if (request.matched_rule and request.matched_rule.is_forward
@@ -127,6 +143,11 @@ class RulesMiddleware(CsrfViewMiddleware):
         # In case we receice a 'Do Not Track' Header
         patch_vary_headers(response, ('DNT',))
 
+        # Responses built from exceptions raised in a proxy view
+        # (ex: `PermissionDenied`) did not go through its `dispatch()`.
+        if 'total' in get_timer(request).durations:
+            add_server_timing(request, response)
+
         # Sets the CORS headers as appropriate.
         app = get_current_app(request)
         origin = request.META.get('HTTP_ORIGIN')
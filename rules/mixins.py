@@ -22,21 +22,22 @@
 # OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
 # ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-import logging
+import hashlib, logging
 
-from deployutils.apps.django_deployutils.backends.encrypted_cookies import (
-    SessionStore as CookieSessionStore)
-from deployutils.apps.django_deployutils.backends.jwt_session_store import (
-    SessionStore as JWTSessionStore)
 from deployutils.apps.django_deployutils.settings import SESSION_COOKIE_NAME
 from django.contrib.auth import get_user_model
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.utils.module_loading import import_string
 from rest_framework.generics import get_object_or_404
 
 from . import settings
 from .compat import is_authenticated, six
-from .models import Engagement
-from .utils import datetime_or_now, get_current_enc_key
+from .metrics import count_cache
+from .models import Engagement, EngagementRollup
+from .timings import timed
+from .utils import (datetime_or_now, get_app_version, get_current_enc_key,
+    is_app_version_shared)
 from .extras import AppMixinBase
 
 
@@ -47,6 +48,39 @@ class AppMixin(AppMixinBase, settings.EXTRA_MIXIN):
     pass
 
 
+class AppVersionMixin(object):
+    """
+    Responds to a conditional GET with a 304 Not Modified, without
+    running the view, when neither the access rules nor the configuration
+    of ``app`` changed since the version the client has.
+
+    Versions are only trusted when they are kept in a cache shared between
+    processes, otherwise each process would start its own.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not is_app_version_shared():
+            return super(AppVersionMixin, self).get(request, *args, **kwargs)
+        version = get_app_version(self.app)
+        etag = '%d-%d' % (self.app.pk, version)
+        if request.GET:
+            # Pages, filters and sort orders are different representations.
+            etag += '-%s' % hashlib.md5(
+                request.GET.urlencode().encode('utf-8')).hexdigest()[:8]
+        etag = quote_etag(etag)
+        last_modified = version // 1000000
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        count_cache('http_conditional', response is not None)
+        if response is None:
+            response = super(AppVersionMixin, self).get(
+                request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
 class EngagementMixin(object):
     """
     Records ``Engagement`` with a ``App``.
@@ -64,6 +98,9 @@ class EngagementMixin(object):
                     # Avoid too many INSERT statements
                     engagement.last_visited = datetime_or_now()
                     engagement.save()
+                    EngagementRollup.objects.increment_engaged(
+                        self.engagement_trigger, self.request.user,
+                        engagement.last_visited)
                     LOGGER.info("initial '%s' engagement with %s",
                         self.engagement_trigger, self.request.path)
                 else:
@@ -100,12 +137,19 @@ class SessionDataMixin(object):
         return self._session_cookie_string
 
     def get_session_cookie_string(self, request, app, rule, session):
+        # Session backends pull cryptographic libraries which are only
+        # worth loading once we actually forward a session.
+        #pylint:disable=import-outside-toplevel
+        from deployutils.apps.django_deployutils.backends.encrypted_cookies \
+            import SessionStore as CookieSessionStore
+
         # This is the latest time we can populate the session
         # since after that we need it to encrypt the cookie string.
-        enc_key = get_current_enc_key(request=request)
-        session.update(self.serialize_request(request, app, rule))
-        session_store = CookieSessionStore(enc_key)
-        session_token = session_store.prepare(session, enc_key)
+        with timed(request, 'session'):
+            enc_key = get_current_enc_key(request=request)
+            session.update(self.serialize_request(request, app, rule))
+            session_store = CookieSessionStore(enc_key)
+            session_token = session_store.prepare(session, enc_key)
         if not isinstance(session_token, six.string_types):
             # Because we don't want Python3 to prefix our strings with b'.
             session_token = session_token.decode('ascii')
@@ -123,12 +167,17 @@ class SessionDataMixin(object):
         return self._session_jwt_string
 
     def get_session_jwt_string(self, request, app, rule, session):
+        #pylint:disable=import-outside-toplevel
+        from deployutils.apps.django_deployutils.backends.jwt_session_store \
+            import SessionStore as JWTSessionStore
+
         # This is the latest time we can populate the session
         # since after that we need it to encrypt the cookie string.
-        enc_key = get_current_enc_key(request=request)
-        session.update(self.serialize_request(request, app, rule))
-        session_store = JWTSessionStore(enc_key)
-        session_token = session_store.prepare(session, enc_key)
+        with timed(request, 'session'):
+            enc_key = get_current_enc_key(request=request)
+            session.update(self.serialize_request(request, app, rule))
+            session_store = JWTSessionStore(enc_key)
+            session_token = session_store.prepare(session, enc_key)
         if not isinstance(session_token, six.string_types):
             # Because we don't want Python3 to prefix our strings with b'.
             session_token = session_token.decode('ascii')
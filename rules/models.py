@@ -27,7 +27,8 @@ Models for the rules application.
 """
 from __future__ import unicode_literals
 
-import datetime, json, logging, re
+import bisect, datetime, json, logging, re, threading
+from contextlib import contextmanager
 try:
     # Python 2
     from itertools import izip
@@ -36,13 +37,17 @@ except ImportError:
     izip = zip # pylint:disable=invalid-name
 
 from django.core.validators import RegexValidator
-from django.db import models
-from django.db.models import Q
+from django.db import IntegrityError, models, transaction
+from django.db.models import Min, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.module_loading import import_string
 
 from . import settings
 from .compat import (gettext_lazy as _, python_2_unicode_compatible,
     timezone_or_utc)
+from .signals import app_created, apps_created, rules_updated
+from .utils import reset_app_versions
 
 
 LOGGER = logging.getLogger(__name__)
@@ -73,7 +78,7 @@ class Engagement(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
         related_name='engagements')
-    last_visited = models.DateTimeField(
+    last_visited = models.DateTimeField(db_index=True,
         default=datetime.datetime(1971, 1, 1).replace(tzinfo=timezone_or_utc()))
     # 1971 instead of 1970 to avoid Overflow exception in South.
 
@@ -84,8 +89,148 @@ class Engagement(models.Model):
         return "%s-%s" % (self.slug, self.user)
 
 
+def truncate_to_hour(at_time):
+    return at_time.replace(minute=0, second=0, microsecond=0)
+
+
+class EngagementRollupManager(models.Manager):
+
+    def increment_engaged(self, slug, user, at_time):
+        """
+        Adds *user* to the users first engaged with tag *slug* in the hour
+        of *at_time*, unless *user* had engaged with *slug* before their
+        engagements were purged. Returns ``True`` when *user* was counted.
+        """
+        purged = PurgedEngagement.objects.filter(user=user).values_list(
+            'slugs', flat=True).first()
+        if purged and slug in purged.split(','):
+            return False
+        self.increment(slug, at_time)
+        return True
+
+    def increment(self, slug, at_time):
+        """
+        Adds one user first engaged with tag *slug* in the hour of *at_time*.
+        """
+        period = truncate_to_hour(at_time)
+        if not self.filter(period=period, slug=slug).update(
+                count=models.F('count') + 1):
+            try:
+                with transaction.atomic(using=self._db):
+                    self.create(period=period, slug=slug, count=1)
+            except IntegrityError:
+                # Another process created the rollup in the meantime.
+                self.filter(period=period, slug=slug).update(
+                    count=models.F('count') + 1)
+
+
+@python_2_unicode_compatible
+class PurgedEngagement(models.Model):
+    """
+    Tags a user had engaged with when their engagements were purged
+    (see ``rules_purge_engagements``), such that engaging with them again
+    is not counted as a first engagement.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, primary_key=True,
+        on_delete=models.CASCADE, related_name='purged_engagements')
+    slugs = models.TextField(
+        help_text=_("Comma-separated tags the user had engaged with"))
+    purged_at = models.DateTimeField(
+        help_text=_("Last time engagements of the user were purged"))
+
+    def __str__(self):
+        return "%s-purged" % self.user
+
+
+@python_2_unicode_compatible
+class EngagementRollup(models.Model):
+    """
+    Number of users that first engaged with a tag during an hour (UTC).
+
+    Hourly periods are summed into the date ranges, in any timezone,
+    requested by the engagement API without scanning ``Engagement``.
+    """
+    objects = EngagementRollupManager()
+
+    period = models.DateTimeField(
+        help_text=_("Start of the hour the counts apply to"))
+    slug = models.SlugField(
+        help_text=_("Engagement tag"))
+    count = models.PositiveIntegerField(default=0,
+        help_text=_("Number of users that first engaged with the tag"))
+
+    class Meta:
+        unique_together = ('period', 'slug')
+
+    def __str__(self):
+        return "%s-%s" % (self.period.isoformat(), self.slug)
+
+
+@python_2_unicode_compatible
+class ActivityRollup(models.Model):
+    """
+    Number of users whose last login happened during an hour (UTC),
+    and total number of users at the time the period was rolled up.
+
+    Rows are only created by the ``rules_engagement_rollup`` command,
+    once an hour is over.
+    """
+    period = models.DateTimeField(unique=True,
+        help_text=_("Start of the hour the counts apply to"))
+    active_users = models.PositiveIntegerField(default=0,
+        help_text=_("Number of users that logged in during the period"))
+    total_users = models.PositiveIntegerField(default=0,
+        help_text=_("Number of users when the period was rolled up"))
+
+    def __str__(self):
+        return self.period.isoformat()
+
+
 class AppManager(models.Manager):
 
+    def bulk_create_with_rules(self, apps, batch_size=1000,
+                               per_app_signal=False):
+        """
+        Creates *apps* and their ``settings.DEFAULT_RULES`` with one INSERT
+        statement for the apps and one for the rules of each batch
+        of *batch_size* apps.
+
+        ``apps_created`` is sent once per batch, or ``app_created`` once per
+        app when *per_app_signal* is ``True``.
+        """
+        apps = list(apps)
+        created = []
+        for start in range(0, len(apps), batch_size):
+            batch = apps[start:start + batch_size]
+            with transaction.atomic(using=self._db):
+                batch = self.bulk_create(batch)
+                if any(app.pk is None for app in batch):
+                    # The database cannot return primary keys
+                    # from a bulk INSERT statement.
+                    pks = dict(self.filter(
+                        slug__in=[app.slug for app in batch]).values_list(
+                        'slug', 'pk'))
+                    for app in batch:
+                        app.pk = pks[app.slug]
+                        app._state.adding = False #pylint:disable=protected-access
+                #pylint:disable=no-member
+                Rule.objects.db_manager(using=self._db).bulk_create([
+                    Rule(app=app, rank=(rank_min_one + 1) * Rule.RANK_GAP,
+                        path=path, rule_op=rule_op, is_forward=is_forward)
+                    for app in batch
+                    for rank_min_one, (path, rule_op, is_forward)
+                    in enumerate(settings.DEFAULT_RULES)])
+                _reset_app_versions_on_commit(
+                    [app.pk for app in batch], using=self._db)
+            if per_app_signal:
+                for app in batch:
+                    app_created.send(sender=__name__, app=app, request=None)
+            else:
+                apps_created.send(sender=__name__, apps=batch)
+            created += batch
+        LOGGER.info("created %d apps with default rules", len(created))
+        return created
+
     def get_or_create(self, defaults=None, **kwargs):
         app, created = super(AppManager, self).get_or_create(
             defaults=defaults, **kwargs)
@@ -94,7 +239,7 @@ class AppManager(models.Manager):
                 in enumerate(settings.DEFAULT_RULES):
                 #pylint:disable=no-member
                 Rule.objects.db_manager(using=self._db).get_or_create(
-                    app=app, rank=rank_min_one + 1,
+                    app=app, rank=(rank_min_one + 1) * Rule.RANK_GAP,
                     defaults={'path':path, 'rule_op':rule_op,
                         'is_forward': is_forward})
         return app, created
@@ -133,7 +278,7 @@ class BaseApp(models.Model):
         null=True, on_delete=models.CASCADE)
 
     # Fields for proxy features
-    path_prefix = models.CharField(max_length=26, null=True,
+    path_prefix = models.CharField(max_length=26, null=True, db_index=True,
         help_text=_("Path prefix for all rules in the app"))
     entry_point = models.URLField(max_length=100, null=True,
         help_text=_("Entry point to which requests will be redirected to"))
@@ -201,6 +346,187 @@ class RuleManager(models.Manager):
         return self.db_manager(using=app._state.db).filter(
             *args, app=app).order_by('rank')
 
+    def renumber(self, app):
+        """
+        Spreads the ranks of all access rules in *app* ``Rule.RANK_GAP``
+        apart, such that a rule can later be inserted or moved in-between
+        any two rules by updating a single row.
+
+        Returns the list of access rules ordered by rank.
+        """
+        rules = list(self.get_rules(app))
+        for idx, rule in enumerate(rules):
+            rule.rank = (idx + 1) * self.model.RANK_GAP
+        self.update_ranks(app, rules)
+        LOGGER.info("renumbered %d rules for %s", len(rules), app)
+        return rules
+
+    def sync(self, app, declared):
+        """
+        Updates the access rules of *app* such that they match the ordered
+        list *declared*, using as few writes as possible.
+
+        Each item in *declared* is a dictionnary with a ``path`` key and
+        optionally ``rule_op``, ``kwargs``, ``is_forward`` and ``engaged``.
+        Missing keys take the model default values. Rules whose path is not
+        in *declared* are deleted. Rules that are already in the declared
+        relative order keep their rank.
+
+        ``rules_updated`` is sent once the changes are committed.
+
+        Returns the access rules ordered by rank.
+        """
+        #pylint:disable=too-many-locals
+        current = {rule.path: rule for rule in self.get_rules(app)}
+        rules = []
+        changed = set([])
+        for item in declared:
+            rule = current.pop(item['path'], None)
+            if rule is None:
+                rule = self.model(app=app, path=item['path'])
+            for field_name in self.model.SYNC_FIELDS:
+                value = item.get(field_name,
+                    self.model._meta.get_field(field_name).get_default())
+                if getattr(rule, field_name) != value:
+                    setattr(rule, field_name, value)
+                    changed.add(id(rule))
+            rules += [rule]
+
+        old_ranks = [rule.rank for rule in rules]
+        _assign_ranks(rules)
+
+        #pylint:disable=protected-access
+        db_manager = self.db_manager(using=app._state.db)
+        with transaction.atomic(using=db_manager.db):
+            with _rules_updated_on_commit(app, using=db_manager.db):
+                if current:
+                    db_manager.filter(
+                        pk__in=[rule.pk for rule in current.values()]).delete()
+                self.update_ranks(app, [rule for rule, old_rank
+                    in izip(rules, old_ranks) if rule.pk and (
+                        id(rule) in changed or rule.rank != old_rank)],
+                    fields=self.model.SYNC_FIELDS)
+                db_manager.bulk_create([rule for rule in rules if not rule.pk])
+        return rules
+
+    def reorder(self, app, rules):
+        """
+        Saves *rules*, all the access rules of *app* in the order they
+        should be considered, updating as few ranks as possible.
+
+        Returns the list of access rules ordered by rank.
+        """
+        old_ranks = [rule.rank for rule in rules]
+        _assign_ranks(rules)
+        self.update_ranks(app, [rule for rule, old_rank
+            in izip(rules, old_ranks) if rule.rank != old_rank])
+        return rules
+
+    def update_ranks(self, app, rules, fields=None):
+        """
+        Saves the rank, and optionally other *fields*, of *rules*.
+
+        The unique ('app', 'rank') constraint is checked row by row
+        on most databases. When a new rank is still held by another rule
+        in *rules*, all *rules* are first moved out of the way, below
+        the lowest rank, before being saved with their new rank.
+
+        ``rules_updated`` is sent once the changes are committed.
+        """
+        if not rules:
+            return
+        #pylint:disable=protected-access
+        db_manager = self.db_manager(using=app._state.db)
+        new_ranks = [rule.rank for rule in rules]
+        held_by = {rank: pk for pk, rank in db_manager.filter(
+            pk__in=[rule.pk for rule in rules]).values_list('pk', 'rank')}
+        with _rules_updated_on_commit(app, using=db_manager.db):
+            if any(held_by.get(rule.rank, rule.pk) != rule.pk
+                   for rule in rules):
+                lowest = db_manager.filter(app=app).aggregate(
+                    Min('rank')).get('rank__min')
+                offset = min([0, lowest or 0] + new_ranks) - 1
+                for idx, rule in enumerate(rules):
+                    rule.rank = offset - idx
+                db_manager.bulk_update(rules, ['rank'])
+                for rule, rank in izip(rules, new_ranks):
+                    rule.rank = rank
+            db_manager.bulk_update(rules, ['rank'] + list(fields or []))
+
+
+def _longest_increasing_subsequence(values):
+    """
+    Returns the indices in *values* of the longest strictly increasing
+    subsequence.
+    """
+    tails = []      # values ending the increasing subsequences found so far
+    tails_idx = []  # index in *values* of each item in `tails`
+    prevs = []      # index of the previous item in the subsequence
+    for idx, value in enumerate(values):
+        pos = bisect.bisect_left(tails, value)
+        if pos == len(tails):
+            tails += [value]
+            tails_idx += [idx]
+        else:
+            tails[pos] = value
+            tails_idx[pos] = idx
+        prevs += [tails_idx[pos - 1] if pos > 0 else None]
+    indices = []
+    idx = tails_idx[-1] if tails_idx else None
+    while idx is not None:
+        indices += [idx]
+        idx = prevs[idx]
+    return list(reversed(indices))
+
+
+def _fill_ranks(rules, kept):
+    """
+    Spreads ranks for *rules*, which are not at an index in *kept*,
+    in-between the ranks of the rules that are.
+
+    Returns ``False`` if there is not enough space between two kept ranks.
+    """
+    idx = 0
+    while idx < len(rules):
+        if idx in kept:
+            idx += 1
+            continue
+        end = idx
+        while end < len(rules) and end not in kept:
+            end += 1
+        count = end - idx
+        lower = rules[idx - 1].rank if idx > 0 else None
+        upper = rules[end].rank if end < len(rules) else None
+        if lower is None and upper is None:
+            lower, step = 0, Rule.RANK_GAP
+        elif lower is None:
+            lower, step = upper - (count + 1) * Rule.RANK_GAP, Rule.RANK_GAP
+        elif upper is None:
+            step = Rule.RANK_GAP
+        else:
+            step = (upper - lower) // (count + 1)
+            if step < 1:
+                return False
+        for pos in range(count):
+            rules[idx + pos].rank = lower + (pos + 1) * step
+        idx = end
+    return True
+
+
+def _assign_ranks(rules):
+    """
+    Assigns ranks to the ordered list *rules* such that the rules which
+    keep their rank are the longest run of existing rules which are
+    already in increasing rank order. All ranks are spread
+    ``Rule.RANK_GAP`` apart when there is not enough space left.
+    """
+    existing = [idx for idx, rule in enumerate(rules) if rule.pk]
+    kept = set([existing[idx] for idx in _longest_increasing_subsequence(
+        [rules[idx].rank for idx in existing])])
+    if not _fill_ranks(rules, kept):
+        for idx, rule in enumerate(rules):
+            rule.rank = (idx + 1) * Rule.RANK_GAP
+
 
 @python_2_unicode_compatible
 class Rule(models.Model):
@@ -210,6 +536,13 @@ class Rule(models.Model):
     """
     ANY = 0
 
+    # Ranks are spaced such that inserting or moving a rule only updates
+    # that rule. Ranks are spread again when there is no space left.
+    RANK_GAP = 1024
+
+    # Fields set from a declared list of rules (see `RuleManager.sync`).
+    SYNC_FIELDS = ('rule_op', 'kwargs', 'is_forward', 'engaged')
+
     objects = RuleManager()
 
     app = models.ForeignKey(settings.RULES_APP_MODEL,
@@ -231,14 +564,35 @@ class Rule(models.Model):
         help_text=_("Tags to check if it is the first time a user engages"))
     rank = models.IntegerField(
         help_text=_("Determines the order in which rules are considered"))
+    # `moved` is no longer used to reorder rules. It is kept such that
+    # tables created by previous versions still accept inserts.
     moved = models.BooleanField(default=False)
 
     class Meta:
-        unique_together = (('app', 'rank', 'moved'), ('app', 'path'))
+        unique_together = (('app', 'rank'), ('app', 'path'))
 
     def __str__(self):
         return "%s/%s" % (self.app, self.path)
 
+    @classmethod
+    def get_rank_between(cls, lower=None, upper=None):
+        """
+        Returns a rank strictly in-between *lower* and *upper*,
+        or ``None`` when there is no space left in-between.
+
+        ``None`` for *lower* (resp. *upper*) stands for the beginning
+        (resp. the end) of the list of rules.
+        """
+        if lower is None and upper is None:
+            return cls.RANK_GAP
+        if lower is None:
+            return upper - cls.RANK_GAP
+        if upper is None:
+            return lower + cls.RANK_GAP
+        if upper - lower > 1:
+            return (lower + upper) // 2
+        return None
+
     def get_allow(self):
         rule_op = int(self.rule_op)
         if self.kwargs:
@@ -289,3 +643,112 @@ class Rule(models.Model):
             except ValueError:
                 pass
         return params
+
+
+class RuleStatManager(models.Manager):
+
+    def increment(self, rule_id, hits, denied=0, forwarded=0, at_time=None):
+        """
+        Adds *hits*, *denied* and *forwarded* requests to the counters
+        of the rule whose primary key is *rule_id*.
+        """
+        updates = {
+            'hits': models.F('hits') + hits,
+            'denied': models.F('denied') + denied,
+            'forwarded': models.F('forwarded') + forwarded,
+            'last_hit_at': at_time
+        }
+        if not self.filter(rule_id=rule_id).update(**updates):
+            try:
+                with transaction.atomic(using=self._db):
+                    self.create(rule_id=rule_id, hits=hits, denied=denied,
+                        forwarded=forwarded, last_hit_at=at_time)
+            except IntegrityError:
+                # Another process created the counters in the meantime,
+                # or the rule was deleted.
+                self.filter(rule_id=rule_id).update(**updates)
+
+
+@python_2_unicode_compatible
+class RuleStat(models.Model):
+    """
+    Number of requests that matched a ``Rule``, and among those,
+    the number that were denied (or redirected to login) and forwarded.
+
+    Counters are kept in each worker and added here periodically
+    (see ``rules.stats``).
+    """
+    objects = RuleStatManager()
+
+    rule = models.OneToOneField(Rule, primary_key=True,
+        on_delete=models.CASCADE, related_name='stat')
+    hits = models.PositiveBigIntegerField(default=0,
+        help_text=_("Number of requests matched by the rule"))
+    denied = models.PositiveBigIntegerField(default=0,
+        help_text=_("Number of matched requests that were denied access"))
+    forwarded = models.PositiveBigIntegerField(default=0,
+        help_text=_("Number of matched requests that were forwarded"))
+    last_hit_at = models.DateTimeField(null=True,
+        help_text=_("Last time counters were saved with new hits"))
+
+    def __str__(self):
+        return str(self.rule)
+
+
+_BATCHED = threading.local()
+
+
+def _reset_app_versions_on_commit(app_pks, using=None):
+    """
+    Starts new versions of the access rules and configuration of apps
+    (see ``rules.utils.get_app_version``) once the changes are visible
+    to other processes.
+    """
+    batched = getattr(_BATCHED, 'app_pks', set())
+    app_pks = [app_pk for app_pk in app_pks if app_pk not in batched]
+    if app_pks:
+        transaction.on_commit(lambda: reset_app_versions(app_pks), using=using)
+
+
+@contextmanager
+def _rules_updated_on_commit(app, using=None):
+    """
+    Sends ``rules_updated``, which starts a new version of *app*, once
+    after the changes to its access rules made in the block are committed.
+    Model signals sent in the block do not reset the version of *app*.
+    """
+    batched = getattr(_BATCHED, 'app_pks', None)
+    if batched is None:
+        batched = set([])
+        _BATCHED.app_pks = batched
+    if app.pk in batched:
+        # Nested in a block which sends the signal already.
+        yield
+        return
+    batched.add(app.pk)
+    try:
+        yield
+    finally:
+        batched.discard(app.pk)
+    transaction.on_commit(lambda: rules_updated.send(
+        sender=__name__, app=app), using=using)
+
+
+# Bulk operations in this module reset versions explicitly, or send
+# `rules_updated`, since they do not send model signals.
+@receiver(post_save, sender=settings.RULES_APP_MODEL,
+    dispatch_uid='rules_reset_app_version_on_app_save')
+@receiver(post_delete, sender=settings.RULES_APP_MODEL,
+    dispatch_uid='rules_reset_app_version_on_app_delete')
+def reset_app_version_on_app_change(sender, instance, using, **kwargs):
+    #pylint:disable=unused-argument
+    _reset_app_versions_on_commit([instance.pk], using=using)
+
+
+@receiver(post_save, sender=Rule,
+    dispatch_uid='rules_reset_app_version_on_rule_save')
+@receiver(post_delete, sender=Rule,
+    dispatch_uid='rules_reset_app_version_on_rule_delete')
+def reset_app_version_on_rule_change(sender, instance, using, **kwargs):
+    #pylint:disable=unused-argument
+    _reset_app_versions_on_commit([instance.app_id], using=using)
@@ -0,0 +1,193 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Keyset (a.k.a. cursor) pagination.
+
+Instead of an OFFSET, each page is selected by filtering records that
+come after the key of the last record on the previous page, so deep pages
+are as fast as the first one.
+"""
+
+import base64, json
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .compat import six
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginates a queryset on the view `keyset_ordering`, a sequence of
+    field names (prefixed by '-' for descending order) where the last field
+    is unique (ex: ('-last_login', '-pk')).
+
+    Null values are ordered last. The total number of records is only
+    computed when the ``count`` query parameter is present.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    # Unlike other paginators, keyset pages cannot be unbounded.
+    page_size = api_settings.PAGE_SIZE or 25
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self):
+        self.base_url = None
+        self.next_key = None
+        self.count = None
+
+    @staticmethod
+    def get_ordering(view):
+        return [(field.lstrip('-'), field.startswith('-'))
+            for field in view.keyset_ordering]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            return json.loads(base64.urlsafe_b64decode(
+                encoded.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, key):
+        return base64.urlsafe_b64encode(
+            json.dumps(key).encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def get_key(record, ordering):
+        key = []
+        for field_name, _ in ordering:
+            value = getattr(record, field_name)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            key += [value]
+        return key
+
+    @staticmethod
+    def get_after_key_filter(ordering, key):
+        """
+        Returns a filter for records coming after *key* in *ordering*.
+        """
+        after = Q(pk__in=[])
+        equal = Q()
+        for (field_name, descending), value in zip(ordering, key):
+            if isinstance(value, six.string_types):
+                value = parse_datetime(value) or value
+            if value is None:
+                # nulls last: only ties on the following fields come after.
+                equal &= Q(**{'%s__isnull' % field_name: True})
+                continue
+            lookup = '%s__lt' if descending else '%s__gt'
+            after |= equal & (Q(**{lookup % field_name: value})
+                | Q(**{'%s__isnull' % field_name: True}))
+            equal &= Q(**{field_name: value})
+        return after
+
+    def paginate_queryset(self, queryset, request, view=None):
+        #pylint:disable=attribute-defined-outside-init
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        ordering = self.get_ordering(view)
+        if self.count_query_param in request.query_params:
+            self.count = queryset.count()
+        key = self.decode_cursor(request)
+        if key is not None:
+            if not isinstance(key, list) or len(key) != len(ordering):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                queryset = queryset.filter(self.get_after_key_filter(
+                    ordering, key))
+            except (TypeError, ValueError, ValidationError):
+                # Tampered cursor, ex: an invalid date or a string for
+                # an integer field.
+                raise NotFound(self.invalid_cursor_message)
+        queryset = queryset.order_by(*[
+            F(field_name).desc(nulls_last=True) if descending
+            else F(field_name).asc(nulls_last=True)
+            for field_name, descending in ordering])
+        page = list(queryset[:self.page_size + 1])
+        if len(page) > self.page_size:
+            page = page[:self.page_size]
+            self.next_key = self.get_key(page[-1], ordering)
+        return page
+
+    def get_next_link(self):
+        if self.next_key is None:
+            return None
+        return replace_query_param(self.base_url,
+            self.cursor_query_param, self.encode_cursor(self.next_key))
+
+    def get_paginated_response(self, data):
+        response = {
+            'next': self.get_next_link(),
+            'results': data
+        }
+        if self.count is not None:
+            response.update({'count': self.count})
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {
+                    'type': 'integer',
+                    'example': 123,
+                },
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                },
+                'results': schema,
+            },
+        }
+
+
+class KeysetPaginationMixin(object):
+    """
+    Uses `KeysetPagination` when the ``cursor`` query parameter is present
+    (an empty value returns the first page), and the default pagination
+    class otherwise.
+    """
+    keyset_ordering = ('pk',)
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if (KeysetPagination.cursor_query_param
+                in self.request.query_params):
+                self._paginator = KeysetPagination()
+            else:
+                return super(KeysetPaginationMixin, self).paginator
+        return self._paginator
@@ -24,7 +24,7 @@
 
 from __future__ import unicode_literals
 
-import logging
+import logging, re
 
 from django.conf import settings as django_settings
 from django.contrib.auth import REDIRECT_FIELD_NAME
@@ -33,7 +33,10 @@ from django.contrib.auth.views import redirect_to_login
 
 from . import settings
 from .compat import is_authenticated, six
-from .models import Engagement, Rule
+from .metrics import count_request
+from .models import Engagement, EngagementRollup, Rule
+from .stats import record_rule_decision
+from .timings import timed
 from .utils import datetime_or_now
 
 
@@ -82,22 +85,67 @@ def find_rule(request, app, prefixes=None):
     if matched_rule:
         # Use cached tuple.
         return (matched_rule, matched_params)
-    params = {}
-    request_path = request.path
+    with timed(request, 'match'):
+        return match_rules(Rule.objects.get_rules(app, prefixes=prefixes),
+            request.path)
+
+
+def match_rules(rules, request_path):
+    """
+    Returns a tuple made of the first rule in *rules* which matches
+    *request_path* and a dictionnary of parameters that where extracted
+    from the URL, or ``(None, {})`` when no rule matches.
+    """
+    is_debug = LOGGER.isEnabledFor(logging.DEBUG)
     request_path_parts = [part for part in request_path.split('/') if part]
-    for rule in Rule.objects.get_rules(app, prefixes=prefixes):
+    for rule in rules:
         params = rule.match(request_path_parts)
         if params is not None:
-            LOGGER.debug(
-                "matched %s with %s (rule=%d, forward=%s, params=%s)",
-                request_path, rule.get_full_page_path(),
-                rule.rule_op, rule.is_forward, params)
+            if is_debug:
+                LOGGER.debug(
+                    "matched %s with %s (rule=%d, forward=%s, params=%s)",
+                    request_path, rule.get_full_page_path(),
+                    rule.rule_op, rule.is_forward, params)
             return (rule, params)
-        LOGGER.debug("match %s with %s ... no",
-            '/'.join(request_path_parts), rule.get_full_page_path())
+        if is_debug:
+            LOGGER.debug("match %s with %s ... no",
+                '/'.join(request_path_parts), rule.get_full_page_path())
     return (None, {})
 
 
+def _get_pattern_parts(rule):
+    # `None` stands for a parameter (:slug or {slug}) as in `Rule.match`.
+    return [None if re.match(r'^:(\S+)|\{(\S+)\}$', part) else part
+        for part in rule.get_full_page_path().split('/') if part]
+
+
+def get_shadowed_rules(rules):
+    """
+    Returns a dictionnary of the rules in *rules* (ordered by rank) that
+    can never be matched, keyed by primary key, with the earlier-ranked
+    rule that matches every path they would match as value.
+    """
+    shadowed = {}
+    # Earlier rules indexed by first part. Rules starting with
+    # a parameter, or matching all paths, are indexed under `None`.
+    earlier = {None: []}
+    for rule in rules:
+        parts = _get_pattern_parts(rule)
+        first = parts[0] if parts else None
+        candidates = earlier[None]
+        if first is not None:
+            candidates = candidates + earlier.get(first, [])
+        for candidate, candidate_parts in candidates:
+            if len(candidate_parts) <= len(parts) and all([
+                    candidate_part is None or candidate_part == part
+                    for candidate_part, part in zip(candidate_parts, parts)]):
+                if (shadowed.get(rule.pk) is None or
+                    candidate.rank < shadowed[rule.pk].rank):
+                    shadowed[rule.pk] = candidate
+        earlier.setdefault(first, []).append((rule, parts))
+    return shadowed
+
+
 def redirect_or_denied(request, inserted_url,
                        redirect_field_name=REDIRECT_FIELD_NAME, descr=None):
     if descr is None:
@@ -132,6 +180,8 @@ def engaged(rule, request=None):
                 slug=tag, user=request.user,
                 defaults={'last_visited': datetime_stored})
             if created:
+                EngagementRollup.objects.increment_engaged(
+                    tag, request.user, datetime_stored)
                 LOGGER.info(
                     "initial '%s' engagement%s", tag,
                     (" on %s" % request.path) if request is not None else "",
@@ -158,8 +208,12 @@ def check_matched(request, app, prefixes=None, login_url=None):
     if matched:
         if matched.rule_op == Rule.ANY:
             if is_authenticated(request):
-                last_visited = engaged(matched, request=request)
+                with timed(request, 'engage'):
+                    last_visited = engaged(matched, request=request)
                 session.update({'last_visited': last_visited})
+            record_rule_decision(matched, forwarded=matched.is_forward)
+            count_request(app, matched,
+                'forward' if matched.is_forward else 'local')
             return (None, matched, session)
 
         redirect_url = None
@@ -176,18 +230,25 @@ def check_matched(request, app, prefixes=None, login_url=None):
                     kwargs.update({key: defaults[key]})
             LOGGER.debug("[perms] calling %s(user=%s, kwargs=%s) ...",
                 fail_func.__name__, request.user, kwargs)
-            redirect_url = fail_func(request, **kwargs)
+            with timed(request, 'check'):
+                redirect_url = fail_func(request, **kwargs)
             LOGGER.debug("[perms] call returned %s(user=%s, kwargs=%s) => %s",
                 fail_func.__name__, request.user, kwargs, redirect_url)
             if not redirect_url:
                 redirect_url = None
 
         if not redirect_url:
-            last_visited = engaged(matched, request=request)
+            with timed(request, 'engage'):
+                last_visited = engaged(matched, request=request)
             session.update({'last_visited': last_visited})
+        record_rule_decision(matched, denied=bool(redirect_url),
+            forwarded=not redirect_url and matched.is_forward)
+        count_request(app, matched, 'denied' if redirect_url else (
+            'forward' if matched.is_forward else 'local'))
         return (redirect_url, matched if redirect_url is None else None,
             session)
     LOGGER.debug("unmatched %s", request.path)
+    count_request(app, None, 'unmatched')
     raise NoRuleMatch(request.path)
 
 
@@ -0,0 +1,145 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+On-demand profiling of requests through the proxy.
+
+A request is run under ``cProfile`` when it carries a valid signed
+``X-Rules-Profile`` header (see ``make_profile_token``), or is picked
+at random with probability ``PROFILE_SAMPLE_RATE``. Stats are dumped
+in ``PROFILE_DIR`` as <profile id>.prof, next to a <profile id>.json file
+describing the request, and aggregated with the ``rules_profile`` command.
+The profile id is generated on the server. It starts with the request id
+(``X-Request-Id`` header) when the client sent one.
+"""
+
+import cProfile, json, logging, os, random, re, time, uuid
+
+from django.core import signing
+
+from . import settings
+from .utils import JSONEncoder, datetime_or_now
+
+
+LOGGER = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'HTTP_X_RULES_PROFILE'
+PROFILE_ID_HEADER = 'X-Rules-Profile-Id'
+REQUEST_ID_HEADER = 'HTTP_X_REQUEST_ID'
+
+# Seconds a token returned by `make_profile_token` is accepted for.
+PROFILE_TOKEN_MAX_AGE = 3600
+
+_SALT = 'rules.profiling'
+
+
+def make_profile_token():
+    """
+    Returns a value for the ``X-Rules-Profile`` header, signed with
+    the ``SECRET_KEY`` and valid for `PROFILE_TOKEN_MAX_AGE` seconds.
+    """
+    return signing.TimestampSigner(salt=_SALT).sign('profile')
+
+
+def should_profile(request):
+    if getattr(request, '_rules_profiled', False):
+        # Already profiled by an enclosing middleware or view.
+        return False
+    token = request.META.get(PROFILE_HEADER)
+    if token:
+        try:
+            signing.TimestampSigner(salt=_SALT).unsign(
+                token, max_age=PROFILE_TOKEN_MAX_AGE)
+            return True
+        except signing.BadSignature as err:
+            LOGGER.warning("invalid profile token on %s %s: %s",
+                request.method, request.path, err)
+    rate = settings.PROFILE_SAMPLE_RATE
+    return bool(rate) and random.random() < rate
+
+
+def get_request_id(request):
+    return re.sub(r'[^a-zA-Z0-9_-]', '',
+        request.META.get(REQUEST_ID_HEADER, ''))[:64]
+
+
+def get_profile_id(request_id=None):
+    """
+    Returns a unique name for a profile. The client-provided *request_id*
+    is only used as a prefix such that clients cannot pick the name
+    nor overwrite each other's profiles.
+    """
+    profile_id = '%s-%s' % (
+        datetime_or_now().strftime('%Y%m%dT%H%M%S'), uuid.uuid4().hex[:8])
+    if request_id:
+        profile_id = '%s-%s' % (request_id, profile_id)
+    return profile_id
+
+
+def profile_request(request, func, *args, **kwargs):
+    """
+    Returns ``func(*args, **kwargs)``, run under a profiler when
+    *request* should be profiled.
+    """
+    if not should_profile(request):
+        return func(*args, **kwargs)
+    request._rules_profiled = True #pylint:disable=protected-access
+    request_id = get_request_id(request)
+    profile_id = get_profile_id(request_id)
+    profiler = cProfile.Profile()
+    created_at = datetime_or_now()
+    start = time.perf_counter()
+    response = None
+    try:
+        response = profiler.runcall(func, *args, **kwargs)
+    finally:
+        duration = time.perf_counter() - start
+        try:
+            dump_profile(profiler, profile_id, {
+                'profile_id': profile_id,
+                'request_id': request_id or None,
+                'method': request.method,
+                'path': request.path,
+                'status': getattr(response, 'status_code', None),
+                'duration': round(duration * 1000, 3),
+                'pid': os.getpid(),
+                'created_at': created_at})
+        except OSError as err:
+            LOGGER.warning("could not save profile of %s %s: %s",
+                request.method, request.path, err)
+    response[PROFILE_ID_HEADER] = profile_id
+    return response
+
+
+def dump_profile(profiler, profile_id, meta):
+    if not os.path.isdir(settings.PROFILE_DIR):
+        os.makedirs(settings.PROFILE_DIR)
+    path = os.path.join(settings.PROFILE_DIR, profile_id)
+    profiler.dump_stats(path + '.prof')
+    with open(path + '.json', 'w') as meta_file:
+        json.dump(meta, meta_file, cls=JSONEncoder)
+    LOGGER.info("profiled %s %s in %s.prof", meta['method'], meta['path'],
+        path, extra={'event': 'profile', 'profile_id': profile_id,
+        'request_id': meta.get('request_id')})
@@ -37,10 +37,24 @@ ACCOUNT_MODEL             AUTH_USER_MODEL         Model used in a multi-party im
 ACCOUNT_URL_KWARG         None                    Variable name used in url definition to select an account.
 DEFAULT_APP_CALLABLE      None                    Function to get the default app.
 DEFAULT_RULES             ('/', 0, False)         Rules used when creating a new account
+ENGAGEMENT_CACHE_TIMEOUT  3600                    Seconds engagement time series and cohorts are cached for.
+ENGAGEMENT_RETENTION      None                    Number of days after users last logged in their engagements are purged (None: keep forever).
+EXPORT_DIR                RUN_DIR/exports         Directory where background export jobs write files (RUN_DIR defaults to the temporary directory).
+EXPORT_TTL                86400                   Seconds the file of a completed export job is kept for (None: keep forever).
+EXPORT_WORKERS            2                       Threads running export jobs (0: use the rules_export_worker command).
 EXTRA_MIXIN               object                  Mixin to derive from
+LATENCY_WINDOW            1000                    Number of most recent requests percentiles are computed over, per entry point and per rule (None: no tracking).
+METRICS_DIR               None                    Directory where each process writes its metrics, merged when scraped (None: single process).
 PATH_PREFIX_CALLABLE      None                    Function to retrive the path prefix
+PROFILE_DIR               RUN_DIR/profiles        Directory where profiles of requests are saved (RUN_DIR defaults to the temporary directory).
+PROFILE_SAMPLE_RATE       0                       Fraction of requests profiled (requests with a signed X-Rules-Profile header are always profiled).
 RULE_OPERATORS            ('', 'login_required')  Rules that can be used to decorate a URL.
+SERVER_TIMING             False                   Returns proxy stage durations in a Server-Timing header (True, False, or a request header name which must be present).
 SESSION_SERIALIZER        ``UsernameSerializer``  Serializer used to represent sessions.
+SLOW_REQUEST_THRESHOLDS   {'total': 1}            Seconds per stage over which a proxied request is logged as slow (ex: {'total': 1, 'upstream': 0.5}, None: no log).
+STATS_FLUSH_INTERVAL      60                      Seconds per-rule hit counters are kept in a worker before being saved (None: no counters).
+TRACE_EXPORTER            None                    Class exporting the spans of proxied requests (ex: ``rules.tracing.LogExporter``, None: no spans).
+TRACE_FILE                RUN_DIR/traces.ndjson   File spans are appended to by ``rules.tracing.FileExporter``.
 ========================  ======================  =============
 
 To override defaults, add a RULES configuration block to your project
@@ -55,13 +69,13 @@ Example:
     }
 
 """
+import os, tempfile
 from importlib import import_module
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
-from django.utils import inspect
 
-from .compat import is_authenticated, reverse_lazy, six
+from .compat import BaseChoiceIterator, is_authenticated, reverse_lazy, six
 
 
 _SETTINGS = {
@@ -75,15 +89,32 @@ _SETTINGS = {
     'DEFAULT_RULE_OP': 1,
     'DEFAULT_RULES': [('/', 0, False)],
     'ENC_KEY_OVERRIDE': None,
+    'ENGAGEMENT_CACHE_TIMEOUT': 3600,
+    'ENGAGEMENT_RETENTION': None,
     'ENTRY_POINT_OVERRIDE': None,
+    'EXPORT_DIR': os.path.join(getattr(settings, 'RUN_DIR',
+        tempfile.gettempdir()), 'exports'),
+    'EXPORT_TTL': 86400,
+    'EXPORT_WORKERS': 2,
     'EXTRA_MIXIN': object,
+    'LATENCY_WINDOW': 1000,
     'LOGIN_URL': getattr(settings, 'LOGIN_URL', reverse_lazy('login')),
+    'METRICS_DIR': None,
     'PATH_PREFIX_CALLABLE': None,
+    'PROFILE_DIR': os.path.join(getattr(settings, 'RUN_DIR',
+        tempfile.gettempdir()), 'profiles'),
+    'PROFILE_SAMPLE_RATE': 0,
     'RULE_OPERATORS': (
         '',
         'rules.settings.fail_authenticated'),
+    'SERVER_TIMING': False,
     'SESSION_SERIALIZER': 'rules.api.serializers.UsernameSerializer',
-    'TIMEOUT': getattr(settings, 'REQUESTS_TIMEOUT', 120)
+    'SLOW_REQUEST_THRESHOLDS': {'total': 1},
+    'STATS_FLUSH_INTERVAL': 60,
+    'TIMEOUT': getattr(settings, 'REQUESTS_TIMEOUT', 120),
+    'TRACE_EXPORTER': None,
+    'TRACE_FILE': os.path.join(getattr(settings, 'RUN_DIR',
+        tempfile.gettempdir()), 'traces.ndjson'),
 }
 _SETTINGS.update(getattr(settings, 'RULES', {}))
 
@@ -103,6 +134,9 @@ def _load_perms_func(path):
     """
     Load a function from its path as a string.
     """
+    #pylint:disable=import-outside-toplevel
+    from django.utils import inspect
+
     if not path:
         return "Any", None, {}
     if callable(path):
@@ -143,6 +177,50 @@ def _load_perms_func(path):
     return short_name, func, parms
 
 
+class _LazyTuple(BaseChoiceIterator):
+    """
+    Tuple whose items are only computed the first time they are accessed.
+
+    ``RULE_OPERATORS`` are defined as paths to functions. Importing
+    the modules they live in, as well as inspecting their docstring and
+    arguments, is deferred until a rule is actually checked, so that
+    processes which never check rules (ex: most management commands)
+    do not pay for it at startup.
+    """
+    def __init__(self, func):
+        self._func = func
+        self._items = None
+
+    @property
+    def items(self):
+        if self._items is None:
+            self._items = tuple(self._func())
+        return self._items
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __eq__(self, other):
+        try:
+            return self.items == tuple(other)
+        except TypeError:
+            return NotImplemented
+
+    def __hash__(self):
+        return hash(self.items)
+
+    def __repr__(self):
+        if self._items is None:
+            return '<%s (not loaded)>' % self.__class__.__name__
+        return repr(self._items)
+
+
 RULES_APP_MODEL = getattr(settings, 'RULES_APP_MODEL', 'rules.App')
 APP_SERIALIZER = _SETTINGS.get('APP_SERIALIZER')
 AUTH_USER_MODEL = settings.AUTH_USER_MODEL
@@ -155,16 +233,30 @@ DEFAULT_PREFIXES = _SETTINGS.get('DEFAULT_PREFIXES')
 DEFAULT_RULE_OP = _SETTINGS.get('DEFAULT_RULE_OP')
 DEFAULT_RULES = _SETTINGS.get('DEFAULT_RULES')
 ENC_KEY_OVERRIDE = _SETTINGS.get('ENC_KEY_OVERRIDE')
+ENGAGEMENT_CACHE_TIMEOUT = _SETTINGS.get('ENGAGEMENT_CACHE_TIMEOUT')
+ENGAGEMENT_RETENTION = _SETTINGS.get('ENGAGEMENT_RETENTION')
 ENTRY_POINT_OVERRIDE = _SETTINGS.get('ENTRY_POINT_OVERRIDE')
+EXPORT_DIR = _SETTINGS.get('EXPORT_DIR')
+EXPORT_TTL = _SETTINGS.get('EXPORT_TTL')
+EXPORT_WORKERS = _SETTINGS.get('EXPORT_WORKERS')
 EXTRA_MIXIN = _SETTINGS.get('EXTRA_MIXIN')
+LATENCY_WINDOW = _SETTINGS.get('LATENCY_WINDOW')
 LOGIN_URL = _SETTINGS.get('LOGIN_URL')
+METRICS_DIR = _SETTINGS.get('METRICS_DIR')
 PATH_PREFIX_CALLABLE = _SETTINGS.get('PATH_PREFIX_CALLABLE')
-RULE_OPERATORS = tuple([_load_perms_func(item)
+PROFILE_DIR = _SETTINGS.get('PROFILE_DIR')
+PROFILE_SAMPLE_RATE = _SETTINGS.get('PROFILE_SAMPLE_RATE')
+RULE_OPERATORS = _LazyTuple(lambda: [_load_perms_func(item)
     for item in _SETTINGS.get('RULE_OPERATORS')])
+SERVER_TIMING = _SETTINGS.get('SERVER_TIMING')
 SESSION_SERIALIZER = _SETTINGS.get('SESSION_SERIALIZER')
+SLOW_REQUEST_THRESHOLDS = _SETTINGS.get('SLOW_REQUEST_THRESHOLDS')
+STATS_FLUSH_INTERVAL = _SETTINGS.get('STATS_FLUSH_INTERVAL')
 TIMEOUT = _SETTINGS.get('TIMEOUT')
+TRACE_EXPORTER = _SETTINGS.get('TRACE_EXPORTER')
+TRACE_FILE = _SETTINGS.get('TRACE_FILE')
 
-DB_RULE_OPERATORS = tuple([(idx, item[0])
+DB_RULE_OPERATORS = _LazyTuple(lambda: [(idx, item[0])
     for idx, item in enumerate(RULE_OPERATORS)])
 
 # We would use:
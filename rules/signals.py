@@ -28,9 +28,15 @@ from django.dispatch import Signal
 app_created = Signal(
 #    providing_args=["app", "request"]
 )
+apps_created = Signal(
+#    providing_args=["apps"]
+)
 app_updated = Signal(
 #    providing_args=["app", "changes", "user"]
 )
+rules_updated = Signal(
+#    providing_args=["app"]
+)
 
 user_welcome = Signal(
 #    providing_args=["user"]
@@ -173,6 +173,21 @@ Vue.component('rule-list', {
 });
 
 
+Vue.component('rule-stats', {
+    mixins: [
+        itemListMixin
+    ],
+    data: function(){
+        return {
+            url: this.$urls.rules.api_rule_stats,
+        }
+    },
+    mounted: function(){
+        this.get();
+    }
+});
+
+
 Vue.component('user-engagement', {
     mixins: [
         itemListMixin,
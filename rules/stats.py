@@ -0,0 +1,167 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Per-rule hit counters.
+
+Each thread counts the decisions taken for the requests it serves
+in its own dictionnary, without locks. Once ``STATS_FLUSH_INTERVAL``
+seconds have passed, the counters are handed to a background thread
+which adds them to the database (``RuleStat``), such that saving them
+never slows down nor fails a request. Counters still in memory are saved
+when the process exits.
+"""
+
+import atexit, logging, threading, time
+
+from django.db import connection
+
+from . import settings
+from .metrics import REGISTRY, RULE_STATS_PENDING
+from .models import RuleStat
+from .utils import datetime_or_now
+
+
+LOGGER = logging.getLogger(__name__)
+
+_LOCAL = threading.local()
+
+_SHARDS = []
+_SHARDS_LOCK = threading.Lock()
+
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+class _Shard(object):
+
+    def __init__(self):
+        # rule pk -> [hits, denied, forwarded]
+        self.counts = {}
+        self.flushed_at = time.monotonic()
+
+
+def _get_executor():
+    #pylint:disable=global-statement
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                #pylint:disable=import-outside-toplevel
+                from concurrent.futures import ThreadPoolExecutor
+                # A single thread such that flushes do not wait
+                # on each other's row locks.
+                _EXECUTOR = ThreadPoolExecutor(max_workers=1,
+                    thread_name_prefix='rules-stats')
+    return _EXECUTOR
+
+
+def _get_shard():
+    shard = getattr(_LOCAL, 'shard', None)
+    if shard is None:
+        shard = _Shard()
+        _LOCAL.shard = shard
+        with _SHARDS_LOCK:
+            _SHARDS.append(shard)
+    return shard
+
+
+def record_rule_decision(rule, denied=False, forwarded=False):
+    """
+    Counts a request matched by *rule*.
+    """
+    if settings.STATS_FLUSH_INTERVAL is None or not rule or not rule.pk:
+        return
+    shard = _get_shard()
+    counts = shard.counts.get(rule.pk)
+    if counts is None:
+        counts = [0, 0, 0]
+        shard.counts[rule.pk] = counts
+    counts[0] += 1
+    if denied:
+        counts[1] += 1
+    if forwarded:
+        counts[2] += 1
+    if time.monotonic() - shard.flushed_at >= settings.STATS_FLUSH_INTERVAL:
+        try:
+            _get_executor().submit(_save_counts_in_thread,
+                _take_counts(shard), datetime_or_now())
+        except RuntimeError as err:
+            # The executor is shut down while the interpreter exits.
+            LOGGER.warning("could not schedule saving rule counters: %s", err)
+
+
+def _take_counts(shard):
+    counts = shard.counts
+    shard.counts = {}
+    shard.flushed_at = time.monotonic()
+    return counts
+
+
+def _save_counts(counts, at_time):
+    try:
+        for rule_id, (hits, denied, forwarded) in counts.items():
+            RuleStat.objects.increment(rule_id, hits, denied=denied,
+                forwarded=forwarded, at_time=at_time)
+    except Exception as err: #pylint:disable=broad-except
+        # Counters are statistics. Losing some is better than failing
+        # requests or crashing workers.
+        LOGGER.warning("could not save counters of %d rules: %s",
+            len(counts), err)
+
+
+def _save_counts_in_thread(counts, at_time):
+    try:
+        _save_counts(counts, at_time)
+    finally:
+        # Flushes run in their own thread, with their own connection.
+        connection.close()
+
+
+def flush_rule_stats():
+    """
+    Saves the counters of all threads in the current process.
+    """
+    with _SHARDS_LOCK:
+        shards = list(_SHARDS)
+    at_time = datetime_or_now()
+    for shard in shards:
+        if shard.counts:
+            _save_counts(_take_counts(shard), at_time)
+
+
+def _set_pending_gauge():
+    with _SHARDS_LOCK:
+        shards = list(_SHARDS)
+    RULE_STATS_PENDING.set(sum([len(shard.counts) for shard in shards]))
+
+REGISTRY.register_callback(_set_pending_gauge)
+
+
+@atexit.register
+def _flush_on_exit():
+    # Errors, ex: the database is not reachable anymore, are logged
+    # in `_save_counts`.
+    flush_rule_stats()
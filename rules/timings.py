@@ -0,0 +1,145 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Times the stages of handling a request through the proxy (app
+resolution, rule matching, permission check, engagement writes,
+session encoding, upstream request) with a monotonic clock.
+
+Durations are attached to the ``http_forward`` log event and, depending
+on the ``SERVER_TIMING`` setting, returned in a ``Server-Timing`` header.
+Stages are also recorded as spans when tracing is enabled
+(see ``rules.tracing``).
+"""
+
+import time
+from contextlib import contextmanager
+
+from . import settings
+from .compat import six
+from .tracing import get_trace, is_tracing_enabled, record_span
+
+
+SERVER_TIMING_HEADER = 'Server-Timing'
+
+
+class StageTimer(object):
+    """
+    Accumulates the durations, in seconds, of named stages.
+    """
+
+    def __init__(self):
+        self.durations = {}
+        # Set once the durations were added to a response.
+        self.in_header = False
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0) + (
+                time.perf_counter() - start)
+
+    def as_dict(self):
+        """
+        Returns the durations in milliseconds.
+        """
+        return {name: round(duration * 1000, 3)
+            for name, duration in self.durations.items()}
+
+    def as_header(self):
+        return ', '.join(["%s;dur=%.3f" % (name, duration * 1000)
+            for name, duration in self.durations.items()])
+
+
+def get_timer(request):
+    """
+    Returns the ``StageTimer`` attached to *request*.
+    """
+    # djangorestframework wraps the Django request.
+    request = getattr(request, '_request', request)
+    timer = getattr(request, '_rules_timer', None)
+    if timer is None:
+        timer = StageTimer()
+        request._rules_timer = timer #pylint:disable=protected-access
+    return timer
+
+
+@contextmanager
+def timed(request, name):
+    """
+    Adds the time spent in the block to stage *name* of *request*,
+    and records it as a span when tracing is enabled.
+    """
+    if request is None:
+        yield
+    elif not is_tracing_enabled():
+        with get_timer(request).stage(name):
+            yield
+    else:
+        get_trace(request)
+        start_at = time.time()
+        start = time.perf_counter()
+        try:
+            with get_timer(request).stage(name):
+                yield
+        finally:
+            record_span(request, name, start_at, time.perf_counter() - start)
+
+
+def is_server_timing_enabled(request):
+    """
+    ``SERVER_TIMING`` is either a boolean or the name of a request header
+    (ex: 'X-Server-Timing') which must be present for timings to be
+    returned.
+    """
+    if isinstance(settings.SERVER_TIMING, six.string_types):
+        return ('HTTP_%s' % settings.SERVER_TIMING.upper().replace('-', '_')
+            in request.META)
+    return bool(settings.SERVER_TIMING)
+
+
+def add_server_timing(request, response):
+    """
+    Appends the stage durations of *request* to the ``Server-Timing`` header
+    of *response*, keeping timings set by the upstream application.
+
+    Durations are added once per request, such that both the proxy view
+    and ``RulesMiddleware`` (for responses built from exceptions) can call
+    this function.
+    """
+    if not is_server_timing_enabled(request):
+        return response
+    timer = get_timer(request)
+    header = timer.as_header()
+    if not header or timer.in_header:
+        return response
+    if response.has_header(SERVER_TIMING_HEADER):
+        header = '%s, %s' % (response[SERVER_TIMING_HEADER], header)
+    response[SERVER_TIMING_HEADER] = header
+    timer.in_header = True
+    return response
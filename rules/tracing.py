@@ -0,0 +1,245 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+W3C trace context (https://www.w3.org/TR/trace-context/) for requests
+forwarded by the proxy.
+
+The ``traceparent`` header of an incoming request is parsed, or a new
+trace is started when it is absent or invalid. The forwarded request
+carries a ``traceparent`` header with the same trace id and, as parent id,
+the id of the span covering the upstream call, such that spans recorded
+by the upstream application attach to the proxy hop. ``tracestate`` is
+forwarded unchanged along an inherited trace only.
+
+When ``TRACE_EXPORTER`` is set, the stages timed by ``rules.timings.timed``
+(ex: match, session, upstream) are recorded as child spans of a span
+covering the whole request, and exported once the response is ready.
+Otherwise the parent id of an inherited trace is forwarded unchanged
+since the proxy hop would not be recorded anywhere.
+"""
+
+import json, logging, os, re, threading, time
+
+from django.utils.module_loading import import_string
+
+from . import settings
+
+
+LOGGER = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = 'HTTP_TRACEPARENT'
+TRACESTATE_HEADER = 'HTTP_TRACESTATE'
+
+# Name of the stage whose span id is forwarded as the parent id upstream.
+UPSTREAM_SPAN = 'upstream'
+
+# Stage already covered by the span of the whole request.
+TOTAL_STAGE = 'total'
+
+TRACEPARENT_RE = re.compile(r'^(?P<version>[0-9a-f]{2})-'\
+    r'(?P<trace_id>[0-9a-f]{32})-(?P<parent_id>[0-9a-f]{16})-'\
+    r'(?P<flags>[0-9a-f]{2})(?P<extra>-.*)?$')
+
+SAMPLED_FLAG = 0x01
+
+
+def new_trace_id():
+    return os.urandom(16).hex()
+
+
+def new_span_id():
+    return os.urandom(8).hex()
+
+
+def parse_traceparent(value):
+    """
+    Returns a tuple (trace_id, parent_id, flags) for a ``traceparent``
+    header *value*, or ``None`` if it is invalid.
+    """
+    look = TRACEPARENT_RE.match(value.strip().lower()) if value else None
+    if not look:
+        return None
+    version = look.group('version')
+    if version == 'ff' or (version == '00' and look.group('extra')):
+        return None
+    trace_id = look.group('trace_id')
+    parent_id = look.group('parent_id')
+    if trace_id == '0' * 32 or parent_id == '0' * 16:
+        return None
+    return (trace_id, parent_id, int(look.group('flags'), 16))
+
+
+class Trace(object):
+    """
+    Trace context of a request through the proxy, and the spans
+    recorded while handling it.
+    """
+
+    def __init__(self, traceparent=None, tracestate=None):
+        parsed = parse_traceparent(traceparent)
+        if parsed:
+            self.trace_id, self.parent_id, self.flags = parsed
+            self.tracestate = tracestate
+        else:
+            self.trace_id = new_trace_id()
+            self.parent_id = None
+            self.flags = SAMPLED_FLAG if is_tracing_enabled() else 0
+            self.tracestate = None
+        self.span_id = new_span_id()
+        self.forward_span_id = new_span_id()
+        self.start = time.time()
+        self.spans = []
+
+    @property
+    def is_recording(self):
+        return is_tracing_enabled() and bool(self.flags & SAMPLED_FLAG)
+
+    def get_forward_headers(self):
+        """
+        Returns the trace context headers of the request forwarded
+        upstream. A ``None`` value means the header must be removed.
+        """
+        parent_id = self.forward_span_id
+        if self.parent_id and not self.is_recording:
+            parent_id = self.parent_id
+        return {
+            'TRACEPARENT': '00-%s-%s-%02x' % (
+                self.trace_id, parent_id, self.flags),
+            'TRACESTATE': self.tracestate
+        }
+
+    def add_span(self, name, start, duration, span_id, parent_id,
+                 attributes=None):
+        self.spans += [{
+            'trace_id': self.trace_id,
+            'span_id': span_id,
+            'parent_id': parent_id,
+            'name': name,
+            'start': start,
+            'duration': round(duration * 1000, 3),
+            'attributes': attributes if attributes else {}
+        }]
+
+
+def get_trace(request):
+    """
+    Returns the ``Trace`` attached to *request*.
+    """
+    # djangorestframework wraps the Django request.
+    request = getattr(request, '_request', request)
+    trace = getattr(request, '_rules_trace', None)
+    if trace is None:
+        trace = Trace(traceparent=request.META.get(TRACEPARENT_HEADER),
+            tracestate=request.META.get(TRACESTATE_HEADER))
+        request._rules_trace = trace #pylint:disable=protected-access
+    return trace
+
+
+def is_tracing_enabled():
+    return bool(settings.TRACE_EXPORTER)
+
+
+def record_span(request, name, start, duration):
+    """
+    Records a stage of *request* which started at *start* (seconds since
+    the epoch) and lasted *duration* seconds.
+    """
+    if name == TOTAL_STAGE:
+        return
+    trace = get_trace(request)
+    trace.add_span(name, start, duration,
+        span_id=(trace.forward_span_id if name == UPSTREAM_SPAN
+            else new_span_id()),
+        parent_id=trace.span_id)
+
+
+def export_trace(request, response=None, rule=None):
+    """
+    Records the span covering the whole *request*, which matched
+    the access rule *rule*, and exports all spans recorded for it.
+    """
+    if not is_tracing_enabled():
+        return
+    trace = get_trace(request)
+    if not trace.is_recording:
+        return
+    request = getattr(request, '_request', request)
+    attributes = {
+        'http.method': request.method,
+        'http.target': request.path,
+    }
+    if response is not None:
+        attributes.update({'http.status_code': response.status_code})
+    if rule is not None:
+        attributes.update({'rules.rule': rule.path})
+    trace.add_span('proxy', trace.start, time.time() - trace.start,
+        span_id=trace.span_id, parent_id=trace.parent_id,
+        attributes=attributes)
+    try:
+        get_exporter().export(trace.spans)
+    except Exception as err: #pylint:disable=broad-except
+        # Tracing must never fail a request.
+        LOGGER.warning("could not export trace %s: %s", trace.trace_id, err)
+    trace.spans = []
+
+
+_EXPORTER = (None, None)
+
+
+def get_exporter():
+    global _EXPORTER #pylint:disable=global-statement
+    path, exporter = _EXPORTER
+    if path != settings.TRACE_EXPORTER:
+        exporter = import_string(settings.TRACE_EXPORTER)()
+        _EXPORTER = (settings.TRACE_EXPORTER, exporter)
+    return exporter
+
+
+class LogExporter(object):
+    """
+    Logs each span as an event 'span' of the ``rules.tracing`` logger.
+    """
+
+    def export(self, spans):
+        for span in spans:
+            LOGGER.info("span %s %s %s (%sms)", span['trace_id'],
+                span['span_id'], span['name'], span['duration'],
+                extra={'event': 'span', 'span': span})
+
+
+class FileExporter(object):
+    """
+    Appends each span as a JSON line to ``TRACE_FILE``.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def export(self, spans):
+        lines = ''.join(['%s\n' % json.dumps(span) for span in spans])
+        with self.lock:
+            with open(settings.TRACE_FILE, 'a') as trace_file:
+                trace_file.write(lines)
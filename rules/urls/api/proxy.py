@@ -28,9 +28,12 @@ URLs for the resources API of rules.
 
 from ... import settings
 from ...compat import path, re_path
+from ...api.exports import (ExportJobDetailAPIView,
+    ExportJobDownloadAPIView, UserEngagementExportAPIView)
 from ...api.keys import (AppUpdateAPIView, GenerateKeyAPIView)
 from ...api.rules import (RuleListAPIView, RuleDetailAPIView,
-    UserEngagementAPIView, EngagementAPIView)
+    UserEngagementAPIView, EngagementAPIView, EngagementCohortAPIView,
+    EngagementSeriesAPIView, LatencyStatsAPIView, RuleStatsAPIView)
 from ...api.sessions import GetSessionAPIView, GetSessionDetailAPIView
 
 urlpatterns = [
@@ -42,8 +45,24 @@ urlpatterns = [
         GenerateKeyAPIView.as_view(), name='rules_api_generate_key'),
     path('proxy/engagement/users',
         UserEngagementAPIView.as_view(), name='rules_api_user_engagement'),
+    path('proxy/engagement/exports/<slug:job>/download',
+        ExportJobDownloadAPIView.as_view(), name='rules_api_export_download'),
+    path('proxy/engagement/exports/<slug:job>',
+        ExportJobDetailAPIView.as_view(), name='rules_api_export_detail'),
+    path('proxy/engagement/exports',
+        UserEngagementExportAPIView.as_view(),
+        name='rules_api_engagement_exports'),
+    path('proxy/engagement/series',
+        EngagementSeriesAPIView.as_view(), name='rules_api_engagement_series'),
+    path('proxy/engagement/cohorts',
+        EngagementCohortAPIView.as_view(),
+        name='rules_api_engagement_cohorts'),
     path('proxy/engagement',
         EngagementAPIView.as_view(), name='rules_api_engagement'),
+    path('proxy/stats/latency',
+        LatencyStatsAPIView.as_view(), name='rules_api_latency_stats'),
+    path('proxy/stats/rules',
+        RuleStatsAPIView.as_view(), name='rules_api_rule_stats'),
     re_path(r'^proxy/rules/(?P<path>%s)$' % settings.PATH_RE,
         RuleDetailAPIView.as_view(), name='rules_api_rule_detail'),
     path('proxy/rules',
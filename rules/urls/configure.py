@@ -25,12 +25,15 @@
 from ..compat import path
 from ..views.app import AppDashboardView, UserEngagementView
 from ..views.download import UserEngagementCSVView
+from ..views.metrics import MetricsView
 
 urlpatterns = [
     path('proxy/engagement/download/',
         UserEngagementCSVView.as_view(), name='rules_user_engagement_download'),
     path('proxy/engagement/',
         UserEngagementView.as_view(), name='rules_user_engagement'),
+    path('proxy/metrics',
+        MetricsView.as_view(), name='rules_metrics'),
     path('proxy/rules/',
         AppDashboardView.as_view(), name='rules_update'),
 ]
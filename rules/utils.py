@@ -22,20 +22,32 @@
 # OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
 # ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-import datetime, json, logging, sys
+import bisect, datetime, json, logging, sys, time
 
 from django.apps import apps as django_apps
+from django.conf import settings as django_settings
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 from django.db.models import Q
+from django.dispatch import receiver
 from django.utils.module_loading import import_string
 from pytz import timezone, UnknownTimeZoneError
 from pytz.tzinfo import DstTzInfo
 
 from .compat import six, timezone_or_utc
+from .signals import rules_updated
 
 
 LOGGER = logging.getLogger(__name__)
 
+APP_VERSION_CACHE_KEY = 'rules_app_version_%s'
+
+# Cache backends which are not shared between processes.
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
 
 class JSONEncoder(json.JSONEncoder):
 
@@ -178,3 +190,103 @@ def parse_tz(tzone):
         except UnknownTimeZoneError:
             pass
     return None
+
+
+def get_period_starts(start_at, ends_at, period='day'):
+    """
+    Returns the start of each day (or week starting on Monday), in the
+    timezone of *start_at*, overlapping [*start_at*, *ends_at*[, followed
+    by the end of the last period.
+    """
+    tz_ob = start_at.tzinfo
+    at_date = start_at.date()
+    step = datetime.timedelta(days=1)
+    if period == 'week':
+        at_date -= datetime.timedelta(days=at_date.weekday())
+        step = datetime.timedelta(days=7)
+    period_starts = []
+    while not period_starts or period_starts[-1] < ends_at:
+        at_time = datetime.datetime(
+            year=at_date.year, month=at_date.month, day=at_date.day)
+        if hasattr(tz_ob, 'localize'):
+            at_time = tz_ob.localize(at_time)
+        else:
+            at_time = at_time.replace(tzinfo=tz_ob)
+        period_starts += [at_time]
+        at_date += step
+    return period_starts
+
+
+def get_period_index(period_starts, at_time):
+    """
+    Returns the index of the period *at_time* falls in, or -1 when
+    *at_time* is outside of *period_starts*.
+    """
+    idx = bisect.bisect_right(period_starts, at_time) - 1
+    return idx if idx < len(period_starts) - 1 else -1
+
+
+def bin_by_period(period_starts, timestamps):
+    """
+    Returns the number of *timestamps* falling in each period.
+    """
+    counts = [0] * (len(period_starts) - 1)
+    for at_time in timestamps:
+        idx = get_period_index(period_starts, at_time)
+        if idx >= 0:
+            counts[idx] += 1
+    return counts
+
+
+def get_app_version(app):
+    """
+    Returns the version of the access rules and configuration for *app*,
+    as a number of microseconds since Epoch.
+
+    The version is kept in the cache such that it is shared between
+    processes (this requires a cache backend shared between processes).
+    When it is missing from the cache, a new version is started.
+    """
+    #pylint:disable=import-outside-toplevel
+    from .metrics import count_cache
+
+    key = APP_VERSION_CACHE_KEY % app.pk
+    version = cache.get(key)
+    count_cache('app_version', version is not None)
+    if version is None:
+        version = int(time.time() * 1000000)
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def update_app_version(app):
+    """
+    Starts a new version of the access rules and configuration for *app*.
+    """
+    version = int(time.time() * 1000000)
+    cache.set(APP_VERSION_CACHE_KEY % app.pk, version, None)
+    return version
+
+
+def reset_app_versions(app_pks):
+    """
+    Forgets the versions of the apps whose primary keys are *app_pks*,
+    such that a new version is started the next time one is requested.
+    """
+    cache.delete_many([APP_VERSION_CACHE_KEY % app_pk for app_pk in app_pks])
+
+
+def is_app_version_shared():
+    """
+    Returns ``True`` when app versions are kept in a cache shared between
+    processes, i.e. all processes agree on the current version.
+    """
+    return django_settings.CACHES.get('default', {}).get(
+        'BACKEND') not in LOCAL_CACHE_BACKENDS
+
+
+@receiver(rules_updated, dispatch_uid='rules_update_app_version')
+def update_app_version_on_rules_updated(sender, app, **kwargs):
+    #pylint:disable=unused-argument
+    update_app_version(app)
@@ -22,7 +22,7 @@
 # OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
 # ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-import json, logging, re
+import json, logging, re, time
 
 from django.contrib.auth import REDIRECT_FIELD_NAME
 from django.contrib.sites.requests import RequestSite
@@ -31,8 +31,6 @@ from django.db.models import Q
 from django.http import HttpResponse, SimpleCookie
 from django.template.response import TemplateResponse
 from django.views.generic import UpdateView, TemplateView
-import requests
-from requests.exceptions import RequestException
 from deployutils.apps.django_deployutils.settings import SESSION_COOKIE_NAME
 
 from .. import settings
@@ -40,6 +38,12 @@ from ..compat import get_model, http_cookies, reverse, six
 from ..mixins import AppMixin, SessionDataMixin
 from ..perms import (check_permissions as base_check_permissions,
     find_rule, redirect_or_denied)
+from ..latency import record_latency
+from ..metrics import UPSTREAM_DURATION, UPSTREAM_ERRORS
+from ..profiling import profile_request
+from ..stats import record_rule_decision
+from ..timings import add_server_timing, get_timer, timed
+from ..tracing import export_trace, get_trace
 from ..utils import (JSONEncoder, get_app_model, get_current_entry_point,
     update_context_urls)
 
@@ -62,6 +66,9 @@ class SessionProxyMixin(SessionDataMixin):
     """
     redirect_field_name = REDIRECT_FIELD_NAME
     login_url = None
+    # Set once the request is forwarded.
+    forwarded_to = None
+    upstream_status = None
 
     def check_permissions(self, request):
         redirect_url, request.matched_rule, self.session = base_check_permissions(
@@ -94,19 +101,36 @@ class SessionProxyMixin(SessionDataMixin):
         return context
 
 # Implementation Note:
-# We cannot override ``dispatch()`` because djangorestframework happens
-# to do user authentication there. Also doing so prevent injection
-# of the edit tools.
+# ``dispatch()`` can be overridden as long as it still calls
+# ``super().dispatch()``, because djangorestframework happens to do
+# user authentication there and the edit tools are injected there.
+# Forwarding itself must stay in the HTTP method handlers though since
+# the user is not authenticated yet before ``super().dispatch()``.
 # On the other hand, we cannnot blindly override `get`, `post`, etc. either
 # because parents might not have implemented the method and it would result
 # in 500 errors when incorrect HTTP requests are generated on the end points.
-#   def dispatch(self, request, *args, **kwargs):
-#       response = self.conditional_forward(request)
-#       if response:
-#           return response
-#       # If we get here, the request was forwarded and we got an exception
-#       # or the request must be handled locally.
-#       return super(SessionProxyMixin, self).dispatch(request, *args, **kwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        # Only decorates the response with stage durations, exports
+        # trace spans, and profiles on demand. Forwarding is still decided
+        # in the HTTP method handlers (see note above).
+        response = None
+        try:
+            with timed(request, 'total'):
+                response = profile_request(request,
+                    super(SessionProxyMixin, self).dispatch,
+                    request, *args, **kwargs)
+        finally:
+            # Requests that raise (ex: `Http404`, `PermissionDenied`)
+            # are traced and counted as well.
+            # djangorestframework views set `matched_rule` on their own
+            # `Request`, which is not *request*.
+            rule = getattr(self.request, 'matched_rule', None)
+            export_trace(request, response, rule=rule)
+            record_latency(request, response, rule=rule,
+                entry_point=self.forwarded_to,
+                upstream_status=self.upstream_status)
+        return add_server_timing(request, response)
 
     def options(self, request, *args, **kwargs):
         # With CORS the browser strips the Authentication header yet
@@ -114,7 +138,12 @@ class SessionProxyMixin(SessionDataMixin):
         self.session = {}
         request.matched_rule, request.matched_params = find_rule(
             request, self.app)
+        record_rule_decision(request.matched_rule,
+            forwarded=request.matched_rule is not None and
+                request.matched_rule.is_forward)
         if request.matched_rule and request.matched_rule.is_forward:
+            #pylint:disable=import-outside-toplevel
+            from requests.exceptions import RequestException
             try:
                 return self.fetch_remote_page()
             except RequestException as err:
@@ -174,6 +203,9 @@ class SessionProxyMixin(SessionDataMixin):
         if response:
             return response
         if forward:
+            # The HTTP client is only loaded once we forward a request.
+            #pylint:disable=import-outside-toplevel
+            from requests.exceptions import RequestException
             try:
                 return self.fetch_remote_page()
             except RequestException as err:
@@ -188,6 +220,9 @@ class SessionProxyMixin(SessionDataMixin):
         Respond with the remote site response after adjusting session
         information and response headers.
         """
+        #pylint:disable=import-outside-toplevel
+        import requests
+
         entry_point = get_current_entry_point(request=self.request)
         forward_url = '%s%s' % (entry_point, self.request.path) # XXX
         requests_args = self.translate_request_args(self.request)
@@ -196,14 +231,31 @@ class SessionProxyMixin(SessionDataMixin):
                 " updated headers: %s",
                 self.request.method, self.request.path, entry_point,
                 self.session, requests_args)
-        else:
-            LOGGER.info("\"%s %s (Fwd to %s)\"", self.request.method,
-                self.request.path, entry_point, extra={
-                    'event': 'http_forward', 'fwd_to': entry_point,
-                    'request': self.request})
-        response = requests.request(
-            self.request.method, forward_url, timeout=settings.TIMEOUT,
-            **requests_args)
+        self.forwarded_to = entry_point
+        start = time.perf_counter()
+        try:
+            with timed(self.request, 'upstream'):
+                response = requests.request(
+                    self.request.method, forward_url,
+                    timeout=settings.TIMEOUT, **requests_args)
+            self.upstream_status = response.status_code
+        except requests.RequestException as err:
+            self.upstream_status = err.__class__.__name__
+            UPSTREAM_ERRORS.inc(entry_point=entry_point,
+                error=err.__class__.__name__)
+            raise
+        finally:
+            UPSTREAM_DURATION.observe(time.perf_counter() - start,
+                entry_point=entry_point)
+            # Logged once the upstream responded such that the event
+            # carries the time spent in each stage.
+            if LOGGER.getEffectiveLevel() != logging.DEBUG:
+                LOGGER.info("\"%s %s (Fwd to %s)\"", self.request.method,
+                    self.request.path, entry_point, extra={
+                        'event': 'http_forward', 'fwd_to': entry_point,
+                        'timings': get_timer(self.request).as_dict(),
+                        'trace_id': get_trace(self.request).trace_id,
+                        'request': self.request})
         return self.translate_response(response)
 
     def translate_request_args(self, request):
@@ -274,6 +326,14 @@ class SessionProxyMixin(SessionDataMixin):
             jwt_token = self.session_jwt_string
             headers.update({'AUTHORIZATION': 'Bearer %s' % jwt_token})
 
+        # Continues the trace of the request, or starts a new one.
+        for key, value in six.iteritems(
+                get_trace(request).get_forward_headers()):
+            if value:
+                headers[key] = value
+            else:
+                headers.pop(key, None)
+
         if request.META.get(
                 'CONTENT_TYPE', '').startswith('multipart/form-data'):
             if request.FILES:
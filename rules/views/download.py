@@ -24,28 +24,97 @@
 
 """
 CSV download view basics.
+
+Downloads are also available as newline-delimited JSON (NDJSON) through
+content negotiation (``Accept: application/x-ndjson`` or ``?format=ndjson``),
+and compressed on the fly when the client accepts a gzip encoding.
 """
 
 from __future__ import unicode_literals
 
-import csv
-from io import BytesIO, StringIO
+import csv, json
 
-from django.http import HttpResponse
+from django.db.models import (Case, Max, When,
+    prefetch_related_objects)
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
 from django.views.generic import View
 from rest_framework.request import Request
 
 from ..compat import six
 from ..mixins import AppMixin
 from ..models import Rule
-from ..utils import datetime_or_now
+from ..utils import JSONEncoder, datetime_or_now
 from ..api.rules import UserEngagementMixin
 
 
+class Echo(object):
+    """
+    Pseudo-buffer which returns what is written into it
+    such that `csv.writer` can produce rows one at a time.
+    """
+    def write(self, value): #pylint:disable=no-self-use
+        return value
+
+
 class CSVDownloadView(View):
 
     basename = 'download'
     filter_backends = []
+    # Number of records loaded (and prefetched) from the database at a time.
+    chunk_size = 2000
+
+    CSV_FORMAT = 'csv'
+    NDJSON_FORMAT = 'ndjson'
+    content_types = {
+        CSV_FORMAT: 'text/csv',
+        NDJSON_FORMAT: 'application/x-ndjson',
+    }
+    accepted_media_types = {
+        'text/csv': CSV_FORMAT,
+        'application/x-ndjson': NDJSON_FORMAT,
+        'application/jsonl': NDJSON_FORMAT,
+    }
+
+    @property
+    def format(self):
+        """
+        Format of the download, either from the ``format`` query parameter
+        or else the first media type in the ``Accept`` header we can produce.
+        """
+        if not hasattr(self, '_format'):
+            self._format = self.request.GET.get('format')
+            if self._format not in self.content_types:
+                self._format = self.CSV_FORMAT
+                for media_type in self.request.META.get(
+                        'HTTP_ACCEPT', '').split(','):
+                    media_type = media_type.split(';')[0].strip().lower()
+                    if media_type in self.accepted_media_types:
+                        self._format = self.accepted_media_types[media_type]
+                        break
+        return self._format
+
+    @property
+    def accepts_gzip(self):
+        """
+        ``True`` when the ``Accept-Encoding`` header lists gzip, or '*' and
+        not gzip, with a non-zero quality value (ex: not 'gzip;q=0').
+        """
+        qualities = {}
+        for coding in self.request.META.get(
+                'HTTP_ACCEPT_ENCODING', '').split(','):
+            params = coding.split(';')
+            quality = 1.0
+            for param in params[1:]:
+                key, _, value = param.partition('=')
+                if key.strip().lower() == 'q':
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0
+            qualities[params[0].strip().lower()] = quality
+        return qualities.get('gzip', qualities.get('*', 0)) > 0
 
     @property
     def headings(self):
@@ -72,29 +141,66 @@ class CSVDownloadView(View):
         return queryset
 
     def get(self, *args, **kwargs): #pylint: disable=unused-argument
-        if six.PY2:
-            content = BytesIO()
+        if self.format == self.NDJSON_FORMAT:
+            rows = self.get_ndjson_rows()
         else:
-            content = StringIO()
-        csv_writer = csv.writer(content)
-        csv_writer.writerow([self.encode(head) for head in self.headings])
-        qs = self.decorate_queryset(self.filter_queryset(self.get_queryset()))
-        for record in qs:
-            csv_writer.writerow(self.queryrow_to_columns(record))
-        content.seek(0)
-        resp = HttpResponse(content, content_type='text/csv')
+            rows = self.get_rows()
+        if self.accepts_gzip:
+            rows = compress_sequence(row.encode('utf-8') for row in rows)
+        resp = StreamingHttpResponse(rows,
+            content_type=self.content_types[self.format])
+        if self.accepts_gzip:
+            resp['Content-Encoding'] = 'gzip'
+        patch_vary_headers(resp, ('Accept', 'Accept-Encoding'))
         resp['Content-Disposition'] = \
             'attachment; filename="{}"'.format(
                 self.get_filename())
         return resp
 
+    def get_ndjson_rows(self):
+        headings = self.headings
+        qs = self.decorate_queryset(self.filter_queryset(self.get_queryset()))
+        for record in self.iterate_queryset(qs):
+            yield json.dumps(dict(zip(headings,
+                self.queryrow_to_columns(record))), cls=JSONEncoder) + '\n'
+
+    def get_rows(self):
+        csv_writer = csv.writer(Echo())
+        yield csv_writer.writerow([self.encode(head) for head in self.headings])
+        qs = self.decorate_queryset(self.filter_queryset(self.get_queryset()))
+        for record in self.iterate_queryset(qs):
+            yield csv_writer.writerow(self.queryrow_to_columns(record))
+
+    def iterate_queryset(self, queryset):
+        """
+        Iterates over *queryset* without caching all records in memory,
+        running the `prefetch_related` lookups one chunk at a time.
+        """
+        #pylint:disable=protected-access
+        lookups = queryset._prefetch_related_lookups
+        if lookups:
+            queryset = queryset.prefetch_related(None)
+        chunk = []
+        for record in queryset.iterator(chunk_size=self.chunk_size):
+            chunk += [record]
+            if len(chunk) >= self.chunk_size:
+                prefetch_related_objects(chunk, *lookups)
+                for item in chunk:
+                    yield item
+                chunk = []
+        if chunk:
+            prefetch_related_objects(chunk, *lookups)
+            for item in chunk:
+                yield item
+
     def get_queryset(self):
         # Note: this should take the same arguments as for
         # Searchable and SortableListMixin in "extra_views"
         raise NotImplementedError
 
     def get_filename(self):
-        return datetime_or_now().strftime(self.basename + '-%Y%m%d.csv')
+        return datetime_or_now().strftime(
+            self.basename + '-%Y%m%d.' + self.format)
 
     def queryrow_to_columns(self, record):
         raise NotImplementedError
@@ -103,6 +209,9 @@ class CSVDownloadView(View):
 class UserEngagementCSVView(UserEngagementMixin, AppMixin, CSVDownloadView):
     """
     Downloads the user engagement as a CSV file
+
+    The user x tag pivot is computed by the database, one row per user
+    with the last time the user engaged with each tag.
     """
 
     @property
@@ -116,14 +225,18 @@ class UserEngagementCSVView(UserEngagementMixin, AppMixin, CSVDownloadView):
             self._headings = ['user'] + list(tags)
         return self._headings
 
+    def get_queryset(self):
+        aggregates = {}
+        for idx, tag in enumerate(self.headings[1:]): # first column is user
+            aggregates['tag_%d' % idx] = Max(Case(When(
+                engagements__slug=tag.strip(),
+                then='engagements__last_visited')))
+        return self.user_model.objects.order_by('-last_login').annotate(
+            **aggregates).values_list(
+            self.user_model.USERNAME_FIELD, *sorted(aggregates,
+                key=lambda alias: int(alias[len('tag_'):])))
+
     def queryrow_to_columns(self, record):
-        by_tags = {}
-        for eng in record.engagements.all():
-            tag = eng.slug.strip()
-            if tag:
-                by_tags[tag] = eng.last_visited
-
-        row = [str(record)]
-        for head in self.headings[1:]: # first column is user
-            row += [by_tags.get(head, "")]
-        return row
+        # Tags a user never engaged with are written as empty cells
+        # by `csv.writer`, and null in NDJSON.
+        return list(record)
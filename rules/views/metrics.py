@@ -0,0 +1,57 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Exposition of metrics in the Prometheus text format.
+"""
+
+from django.http import HttpResponse
+from django.views.generic import View
+
+from ..exports import get_pending_jobs
+from ..metrics import CONTENT_TYPE, REGISTRY, Registry
+
+
+class MetricsView(View):
+    """
+    Returns the metrics of all processes serving the site.
+    """
+
+    @staticmethod
+    def get_scrape_metrics():
+        """
+        Metrics which are computed when scraped, from state shared
+        by all processes, rather than accumulated by each process.
+        """
+        registry = Registry(multiprocess=False)
+        registry.gauge('rules_export_jobs_pending',
+            "Background export jobs waiting to run.").set(
+            len(get_pending_jobs()))
+        return registry.render()
+
+    def get(self, request, *args, **kwargs):
+        #pylint:disable=unused-argument
+        return HttpResponse(REGISTRY.render() + self.get_scrape_metrics(),
+            content_type=CONTENT_TYPE)
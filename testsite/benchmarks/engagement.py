@@ -0,0 +1,83 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Engagement exports: user x tag pivot computed from model instances
+versus computed by the database.
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory
+from rules.models import Engagement, Rule
+from rules.utils import get_app_model
+from rules.views.download import UserEngagementCSVView
+
+from . import measure
+
+
+def run(engagements=1000000, tags=5, **options):
+    #pylint:disable=unused-argument
+    user_model = get_user_model()
+    tag_names = ['tag%d' % idx for idx in range(tags)]
+    nb_users = engagements // tags
+    batch_size = 10000
+    for start in range(0, nb_users, batch_size):
+        users = user_model.objects.bulk_create([
+            user_model(username='bench-%d' % idx)
+            for idx in range(start, min(start + batch_size, nb_users))])
+        if users[0].pk is None:
+            users = user_model.objects.filter(
+                username__in=[user.username for user in users])
+        Engagement.objects.bulk_create([Engagement(slug=tag, user=user)
+            for user in users for tag in tag_names], batch_size=batch_size)
+    app = get_app_model().objects.create(slug='bench-engagement')
+    Rule.objects.create(app=app, rank=Rule.RANK_GAP, path='/',
+        engaged=','.join(tag_names))
+
+    view = UserEngagementCSVView()
+    view.request = RequestFactory().get('/')
+    view.args = []
+    view.kwargs = {}
+    view._app = app #pylint:disable=protected-access
+
+    def model_instances():
+        for user in user_model.objects.order_by(
+                '-last_login').prefetch_related('engagements').iterator(
+                chunk_size=view.chunk_size):
+            by_tags = {}
+            for eng in user.engagements.all():
+                by_tags[eng.slug.strip()] = eng.last_visited
+            [str(user)] + [by_tags.get(tag, "") for tag in tag_names]
+
+    def pivot():
+        for _ in view.get_rows():
+            pass
+
+    nb_rows = user_model.objects.count()
+    return [
+        measure('engagement_rows_from_instances', model_instances,
+            count=nb_rows, engagements=engagements),
+        measure('engagement_rows_from_pivot', pivot,
+            count=nb_rows, engagements=engagements)]
@@ -0,0 +1,156 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Rule matching and permission checks against apps with a growing number
+of access rules of varied path depths.
+"""
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import PermissionDenied
+from django.test import RequestFactory
+
+from rules.models import Rule
+from rules.perms import check_matched, find_rule, redirect_or_denied
+from rules.utils import get_app_model
+
+from . import measure
+
+
+MAX_DEPTH = 6
+
+
+def get_rule_path(idx):
+    """
+    Returns the path of the *idx*-th synthetic rule. Depth varies
+    from 1 to `MAX_DEPTH` and every third part is a parameter.
+    """
+    parts = ['b%d' % idx]
+    for depth in range(1, idx % MAX_DEPTH + 1):
+        if depth % 3 == 2:
+            parts += ['{p%d}' % depth]
+        else:
+            parts += ['s%d' % depth]
+    return '/%s/' % '/'.join(parts)
+
+
+def get_request_path(idx):
+    """
+    Returns a request path matched by the *idx*-th synthetic rule.
+    """
+    return '/%s/' % '/'.join([
+        'v' if part.startswith('{') else part
+        for part in get_rule_path(idx).split('/') if part])
+
+
+def create_rules_app(nb_rules):
+    app = get_app_model().objects.create(slug='bench-rules-%d' % nb_rules)
+    Rule.objects.filter(app=app).delete()
+    # Even ranks do not require authentication, odd ranks do.
+    Rule.objects.bulk_create([Rule(app=app, rank=idx, path=get_rule_path(idx),
+        rule_op=idx % 2, is_forward=True) for idx in range(nb_rules)])
+    return app
+
+
+def run(rules='10,100,1000,10000', iterations=1000, **options):
+    #pylint:disable=too-many-locals,unused-argument
+    results = []
+    factory = RequestFactory(SERVER_NAME='localhost')
+    user = get_user_model().objects.create(username='bench-matching')
+
+    # `Rule.match` does not depend on the number of rules.
+    for depth in range(MAX_DEPTH):
+        rule = Rule(path=get_rule_path(depth))
+        path_parts = [part for part in get_request_path(depth).split('/')
+            if part]
+        miss_parts = ['miss'] + path_parts[1:]
+        def match_hit(rule=rule, path_parts=path_parts):
+            for _ in range(iterations):
+                rule.match(path_parts)
+        def match_miss(rule=rule, path_parts=miss_parts):
+            for _ in range(iterations):
+                rule.match(path_parts)
+        results += [measure('rule_match_hit', match_hit, count=iterations,
+            depth=depth + 1)]
+        results += [measure('rule_match_miss', match_miss, count=iterations,
+            depth=depth + 1)]
+
+    for nb_rules in [int(val) for val in str(rules).split(',')]:
+        app = create_rules_app(nb_rules)
+        # Matching is linear in the number of rules so we keep the total
+        # number of `Rule.match` calls per measure bounded.
+        count = max(1, min(iterations, 100000 // nb_rules))
+        cases = (
+            ('first', get_request_path(0)),
+            ('last', get_request_path(nb_rules - 1)),
+            ('miss', '/miss/'),
+        )
+        for case, path in cases:
+            request = factory.get(path)
+            def find(request=request):
+                for _ in range(count):
+                    request.matched_rule = None
+                    find_rule(request, app)
+            results += [measure('find_rule', find, count=count,
+                rules=nb_rules, case=case)]
+
+        # Last rule that does not require authentication, and last rule
+        # that does.
+        last_any = nb_rules - 1 - (nb_rules - 1) % 2
+        last_login = nb_rules - 1 - nb_rules % 2
+        cases = (
+            ('any_anonymous', get_request_path(last_any), AnonymousUser()),
+            ('any_authenticated', get_request_path(last_any), user),
+            ('login_anonymous', get_request_path(last_login), AnonymousUser()),
+            ('login_authenticated', get_request_path(last_login), user),
+        )
+        for case, path, request_user in cases:
+            request = factory.get(path)
+            request.user = request_user
+            def check(request=request):
+                for _ in range(count):
+                    request.matched_rule = None
+                    check_matched(request, app)
+            results += [measure('check_matched', check, count=count,
+                rules=nb_rules, case=case)]
+
+    # `redirect_or_denied` does not depend on the number of rules.
+    cases = (
+        ('redirect', 'text/html,application/xhtml+xml'),
+        ('denied', 'application/json'),
+    )
+    for case, http_accept in cases:
+        request = factory.get('/app/', HTTP_ACCEPT=http_accept)
+        request.user = AnonymousUser()
+        def redirect(request=request):
+            for _ in range(iterations):
+                try:
+                    redirect_or_denied(request, '/login/')
+                except PermissionDenied:
+                    pass
+        results += [measure('redirect_or_denied', redirect, count=iterations,
+            case=case)]
+    return results
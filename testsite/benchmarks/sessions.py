@@ -0,0 +1,106 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Preparation of forwarded sessions (JWT and encrypted cookies) and
+translation of requests and responses through the proxy.
+"""
+
+import requests
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory
+
+from rules.models import Rule
+from rules.utils import get_app_model
+from rules.views.app import SessionProxyView
+
+from ..upstream import start_upstream
+from . import measure
+
+
+def get_view(request, app, rule):
+    view = SessionProxyView()
+    view.setup(request, app=app.slug)
+    view._app = app #pylint:disable=protected-access
+    view.session = {}
+    request.matched_rule = rule
+    return view
+
+
+def run(iterations=1000, **options):
+    #pylint:disable=too-many-locals,unused-argument
+    results = []
+    factory = RequestFactory(SERVER_NAME='localhost')
+    user = get_user_model().objects.create(username='bench-sessions')
+    app_model = get_app_model()
+    backends = (
+        ('jwt', app_model.JWT_SESSION_BACKEND),
+        ('cookie', app_model.COOKIE_SESSION_BACKEND),
+    )
+    for backend, session_backend in backends:
+        app = app_model.objects.create(slug='bench-sessions-%s' % backend,
+            session_backend=session_backend)
+        rule = Rule.objects.create(app=app, rank=0, path='/app/')
+        request = factory.get('/app/', {'q': 'search'},
+            HTTP_ACCEPT='application/json', HTTP_COOKIE='csrftoken=abc')
+        request.user = user
+        view = get_view(request, app, rule)
+
+        def prepare(request=request, view=view, app=app, rule=rule,
+                    session_backend=session_backend):
+            for _ in range(iterations):
+                if session_backend == app_model.JWT_SESSION_BACKEND:
+                    view.get_session_jwt_string(request, app, rule, {})
+                else:
+                    view.get_session_cookie_string(request, app, rule, {})
+        results += [measure('session_prepare', prepare, count=iterations,
+            backend=backend)]
+
+        def translate_request(request=request, app=app, rule=rule):
+            for _ in range(iterations):
+                # Session strings are cached on the view.
+                get_view(request, app, rule).translate_request_args(request)
+        results += [measure('translate_request_args', translate_request,
+            count=iterations, backend=backend)]
+
+    upstream = start_upstream()
+    try:
+        base_url = 'http://%s:%d' % upstream.server_address
+        view = get_view(factory.get('/app/'), app, rule)
+        cases = (
+            ('small', {}),
+            ('large', {'size': 1048576}),
+            ('cookies', {'cookies': 10}),
+        )
+        for case, params in cases:
+            response = requests.get(base_url, params=params, timeout=10)
+            def translate_response(response=response):
+                for _ in range(iterations):
+                    view.translate_response(response)
+            results += [measure('translate_response', translate_response,
+                count=iterations, case=case)]
+    finally:
+        upstream.shutdown()
+    return results
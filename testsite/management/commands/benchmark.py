@@ -0,0 +1,84 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Runs benchmark suites against the testsite database and prints
+the measures as JSON.
+
+Data created by the benchmarks is rolled back once all suites have run.
+"""
+
+import json, platform, sys
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+
+SUITES = ('provision', 'engagement', 'matching', 'sessions')
+
+
+class Command(BaseCommand):
+    help = "Runs benchmarks and prints results as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('suites', nargs='*', default=SUITES,
+            help="benchmark suites to run (default: all)")
+        parser.add_argument('--apps', action='store', type=int,
+            dest='apps', default=10000,
+            help="number of apps to provision")
+        parser.add_argument('--engagements', action='store', type=int,
+            dest='engagements', default=1000000,
+            help="number of engagement rows in the user x tag pivot")
+        parser.add_argument('--rules', action='store', dest='rules',
+            default='10,100,1000,10000',
+            help="comma-separated numbers of rules in the matched apps")
+        parser.add_argument('--iterations', action='store', type=int,
+            dest='iterations', default=1000,
+            help="number of calls per measure in micro-benchmarks")
+        parser.add_argument('--output', action='store', dest='output',
+            default=None, help="file to write results into (default: stdout)")
+
+    def handle(self, *args, **options):
+        results = {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'suites': {}
+        }
+        with transaction.atomic():
+            for suite in options['suites']:
+                run = import_string('testsite.benchmarks.%s.run' % suite)
+                results['suites'][suite] = run(**options)
+                self.stderr.write("%s done." % suite)
+            transaction.set_rollback(True)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+        else:
+            json.dump(results, sys.stdout, indent=2)
+            sys.stdout.write('\n')
@@ -0,0 +1,115 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Checks the time it takes to import the modules of the rules application
+on the request path stays within budget, and that modules which must
+load on first use (permission operators, session backends) are not
+imported along.
+
+Each run imports the modules in a fresh Python interpreter, right after
+``django.setup()``, such that nothing is already cached in ``sys.modules``.
+The median of all runs is compared to the budget.
+"""
+
+import json, os, subprocess, sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+MODULES = ('rules.views.app', 'rules.mixins', 'rules.perms',
+    'rules.middleware')
+
+# Modules which are only imported once a rule is checked or a session
+# is encoded.
+DEFERRED_MODULES = (
+    'testsite.decorators',
+    'deployutils.apps.django_deployutils.backends.encrypted_cookies',
+    'deployutils.apps.django_deployutils.backends.jwt_session_store',
+    'jwt',
+)
+
+IMPORT_SCRIPT = """
+import importlib, json, sys, time
+import django
+django.setup()
+start = time.perf_counter()
+for module in %(modules)r:
+    importlib.import_module(module)
+print(json.dumps({
+    'seconds': time.perf_counter() - start,
+    'loaded': [module for module in %(deferred)r if module in sys.modules]}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Checks import time of the request path against its budget."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget', action='store', type=float,
+            dest='budget', default=300,
+            help="maximum median import time in milliseconds")
+        parser.add_argument('--runs', action='store', type=int,
+            dest='runs', default=5, help="number of interpreters started")
+
+    def handle(self, *args, **options):
+        script = IMPORT_SCRIPT % {
+            'modules': MODULES, 'deferred': DEFERRED_MODULES}
+        env = dict(os.environ)
+        env.update({
+            'DJANGO_SETTINGS_MODULE': os.environ.get(
+                'DJANGO_SETTINGS_MODULE', 'testsite.settings'),
+            'PYTHONPATH': os.pathsep.join([settings.BASE_DIR] + [
+                path for path in [env.get('PYTHONPATH')] if path])})
+        durations = []
+        loaded = set()
+        for _ in range(options['runs']):
+            output = subprocess.run([sys.executable, '-c', script],
+                env=env, cwd=settings.BASE_DIR, stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE, check=False)
+            if output.returncode != 0:
+                raise CommandError("import failed: %s" %
+                    output.stderr.decode('utf-8', 'replace'))
+            # Settings might print warnings before our measures.
+            measure = json.loads(output.stdout.decode('utf-8').strip(
+                ).splitlines()[-1])
+            durations += [measure['seconds'] * 1000]
+            loaded |= set(measure['loaded'])
+
+        durations.sort()
+        median = durations[len(durations) // 2]
+        self.stdout.write("import of %s: median %.1fms, min %.1fms,"\
+            " max %.1fms over %d runs (budget %.1fms)" % (
+            ', '.join(MODULES), median, durations[0], durations[-1],
+            len(durations), options['budget']))
+        failures = []
+        if median > options['budget']:
+            failures += ["median import time %.1fms over budget of %.1fms" % (
+                median, options['budget'])]
+        if loaded:
+            failures += ["%s imported eagerly" % ', '.join(sorted(loaded))]
+        if failures:
+            raise CommandError('; '.join(failures))
@@ -0,0 +1,197 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Checks the number of SQL queries issued by each hot path of the rules
+application stays within budget, and does not grow with the number
+of rules and users in the database.
+
+Scenarios run through the Django test client against the testsite,
+forwarding to a local stub server, with synthetic rules and users added
+on top of the fixtures. All data created is rolled back.
+
+Reordering access rules through the API is also checked to move rules
+to the expected positions, including on tables with compact ranks.
+"""
+
+import json
+
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from rules.models import Engagement, Rule
+from rules.utils import get_current_app
+
+from ...upstream import start_upstream
+
+
+# (name, method, path, authenticated, extra headers, max queries)
+SCENARIOS = (
+    ('anonymous', 'get', '/qb/public/', False, {}, 3),
+    ('authenticated', 'get', '/qb/private/', True, {}, 5),
+    ('engaged', 'get', '/qb/engaged/', True, {}, 9),
+    ('forwarded', 'post', '/qb/private/', True, {}, 5),
+    ('denied', 'get', '/qb/denied/', True, {'HTTP_ACCEPT': 'application/json'},
+     4),
+    ('preflight', 'options', '/qb/private/', False, {
+        'HTTP_ORIGIN': 'https://example.com',
+        'HTTP_ACCESS_CONTROL_REQUEST_METHOD': 'POST'}, 3),
+    ('api_rules', 'get', '/api/proxy/rules', True, {}, 5),
+    ('api_rules_cursor', 'get', '/api/proxy/rules?cursor=', True, {}, 4),
+    ('api_user_engagement', 'get', '/api/proxy/engagement/users', True, {},
+     5),
+    ('api_engagement', 'get', '/api/proxy/engagement', True, {}, 6),
+    ('engagement_download', 'get', '/proxy/engagement/download/', True, {}, 3),
+)
+
+# (ranks of rules /a/ to /e/, moves, expected order)
+RULE_MOVES = (
+    ((1, 2, 19, 20, 23), ((19, 2), (20, 1)), 'dacbe'),
+    ((1, 2, 19, 20, 23), ((1, 23), (22, 1)), 'ebcda'),
+    ((1024, 2048, 3072), ((3072, 1024), (1024, 4096)), 'abc'),
+)
+
+
+class Command(BaseCommand):
+    help = "Checks query counts of hot paths against their budget."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rules', action='store', dest='rules',
+            default='10,1000',
+            help="comma-separated numbers of rules to add")
+        parser.add_argument('--users', action='store', dest='users',
+            default='10,1000',
+            help="comma-separated numbers of users to add")
+
+    def handle(self, *args, **options):
+        upstream = start_upstream()
+        try:
+            counts = {}
+            for nb_rules in [int(val) for val in options['rules'].split(',')]:
+                for nb_users in [
+                        int(val) for val in options['users'].split(',')]:
+                    with transaction.atomic():
+                        self.populate(upstream, nb_rules, nb_users)
+                        for name, nb_queries in self.run_scenarios():
+                            counts.setdefault(name, []).append(
+                                (nb_rules, nb_users, nb_queries))
+                        transaction.set_rollback(True)
+        finally:
+            upstream.shutdown()
+
+        failures = self.check_rule_moves()
+        for name, _, _, _, _, budget in SCENARIOS:
+            measures = counts[name]
+            nb_queries = [measure[2] for measure in measures]
+            status = "ok"
+            if max(nb_queries) > budget:
+                status = "FAIL (over budget of %d)" % budget
+                failures += [name]
+            elif len(set(nb_queries)) > 1:
+                status = "FAIL (grows with data)"
+                failures += [name]
+            self.stdout.write("%s: %s %s" % (name, status, ', '.join([
+                "%d rules/%d users: %d queries" % measure
+                for measure in measures])))
+        if failures:
+            raise CommandError("checks failed in %s" %
+                ', '.join(failures))
+
+    def check_rule_moves(self):
+        failures = []
+        user = get_user_model().objects.get(username='donny')
+        client = Client(SERVER_NAME='localhost', raise_request_exception=True)
+        client.force_login(user)
+        for ranks, moves, expected in RULE_MOVES:
+            with transaction.atomic():
+                app = get_current_app()
+                Rule.objects.filter(app=app).delete()
+                Rule.objects.bulk_create([
+                    Rule(app=app, rank=rank, path='/%s/' % chr(ord('a') + idx))
+                    for idx, rank in enumerate(ranks)])
+                client.patch('/api/proxy/rules', data=json.dumps({
+                    'updates': [{'oldpos': oldpos, 'newpos': newpos}
+                        for oldpos, newpos in moves]}),
+                    content_type='application/json')
+                found = ''.join([rule.path.strip('/')
+                    for rule in Rule.objects.get_rules(app)])
+                transaction.set_rollback(True)
+            status = "ok"
+            if found != expected:
+                status = "FAIL (expected %s)" % expected
+                failures += ['rule_moves']
+            self.stdout.write("rule_moves: %s %s with %s -> %s" % (
+                status, ranks, moves, found))
+        return failures
+
+    @staticmethod
+    def populate(upstream, nb_rules, nb_users):
+        app = get_current_app()
+        app.entry_point = 'http://%s:%d' % upstream.server_address
+        app.save()
+        # Rules that do not match the scenarios' paths, ranked first
+        # such that every request goes through them.
+        Rule.objects.bulk_create([
+            Rule(app=app, rank=-(nb_rules - idx + 1) * Rule.RANK_GAP,
+                path='/padding/%d/{profile}/' % idx)
+            for idx in range(nb_rules)])
+        # Scenario rules are ranked after the padding (ranks up to
+        # -RANK_GAP) and before the fixtures rules (positive ranks).
+        Rule.objects.bulk_create([
+            Rule(app=app, rank=-4, path='/qb/public/',
+                rule_op=Rule.ANY, is_forward=True),
+            Rule(app=app, rank=-3, path='/qb/private/',
+                rule_op=1, is_forward=True),
+            Rule(app=app, rank=-2, path='/qb/engaged/',
+                rule_op=1, is_forward=True, engaged='qb'),
+            # `fail_direct` in testsite settings.
+            Rule(app=app, rank=-1, path='/qb/denied/',
+                rule_op=2, is_forward=True)])
+        user_model = get_user_model()
+        user_model.objects.bulk_create([
+            user_model(username='qb%d' % idx) for idx in range(nb_users)])
+        Engagement.objects.bulk_create([
+            Engagement(slug='qb', user=user)
+            for user in user_model.objects.filter(username__startswith='qb')])
+
+    @staticmethod
+    def run_scenarios():
+        user = get_user_model().objects.get(username='donny')
+        for name, method, path, authenticated, headers, _ in SCENARIOS:
+            client = Client(SERVER_NAME='localhost',
+                raise_request_exception=True)
+            if authenticated:
+                client.force_login(user)
+            # Warms up (ex: first engagement) then measures the steady state.
+            response = getattr(client, method)(path, **headers)
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(client, method)(path, **headers)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            yield name, len(queries.captured_queries)
@@ -0,0 +1,392 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Boots the testsite under gunicorn with a local stub server as the app
+``entry_point``, drives a mix of requests through the proxy with
+concurrent clients, then prints throughput, latency percentiles
+and per-worker memory as JSON.
+
+Rules used by the load test are added to the current app for
+the duration of the run, and removed afterwards.
+"""
+
+import json, multiprocessing, os, random, signal, socket, subprocess, sys
+import threading, time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.crypto import get_random_string
+
+from rules.models import Rule
+from rules.utils import get_current_app
+
+from ...upstream import serve_upstream
+
+
+DEFAULT_MIX = 'small=60,large=10,upload=10,denied=10,preflight=10'
+
+SCENARIOS = ('small', 'large', 'upload', 'denied', 'preflight')
+
+PATH_PREFIX = '/loadtest'
+
+
+def get_free_port(host):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+    finally:
+        sock.close()
+
+
+def wait_for_port(host, port, timeout=30, process=None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise CommandError("server exited with code %d" %
+                process.returncode)
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise CommandError("%s:%d did not answer in %ds" % (host, port, timeout))
+
+
+def get_children(pid):
+    """
+    Returns the pids of the child processes of *pid*.
+    """
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open('/proc/%s/stat' % entry) as stat:
+                # The command name in parenthesis might contain spaces.
+                fields = stat.read().rsplit(')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[1]) == pid:
+            children += [int(entry)]
+    return children
+
+
+def get_rss_kb(pid):
+    try:
+        with open('/proc/%d/status' % pid) as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def percentile(sorted_values, rank):
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1,
+        max(0, int(round(rank / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[idx]
+
+
+def summarize(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'latency_ms': {
+            'p50': percentile(latencies, 50),
+            'p90': percentile(latencies, 90),
+            'p99': percentile(latencies, 99),
+            'max': latencies[-1] if latencies else None,
+        }
+    }
+
+
+class RSSSampler(threading.Thread):
+    """
+    Samples the resident memory of the gunicorn master and its workers.
+    """
+
+    def __init__(self, pid, interval=0.5):
+        super(RSSSampler, self).__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples = {}
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.sample()
+            self.stopped.wait(self.interval)
+
+    def sample(self):
+        for pid in [self.pid] + get_children(self.pid):
+            rss_kb = get_rss_kb(pid)
+            if rss_kb is None:
+                continue
+            sample = self.samples.setdefault(pid, {
+                'role': 'master' if pid == self.pid else 'worker',
+                'rss_kb_max': rss_kb})
+            sample['rss_kb_max'] = max(sample['rss_kb_max'], rss_kb)
+            sample['rss_kb_last'] = rss_kb
+
+
+class Command(BaseCommand):
+    help = "Runs a load test against the proxy served by gunicorn."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mix', action='store', dest='mix',
+            default=DEFAULT_MIX,
+            help="weighted request mix among %s (default: %s)" % (
+                ', '.join(SCENARIOS), DEFAULT_MIX))
+        parser.add_argument('--duration', action='store', type=float,
+            dest='duration', default=10,
+            help="seconds requests are measured for")
+        parser.add_argument('--warmup', action='store', type=float,
+            dest='warmup', default=2,
+            help="seconds requests are sent before measures start")
+        parser.add_argument('--concurrency', action='store', type=int,
+            dest='concurrency', default=16,
+            help="number of concurrent clients")
+        parser.add_argument('--workers', action='store', type=int,
+            dest='workers', default=2,
+            help="number of gunicorn workers")
+        parser.add_argument('--threads', action='store', type=int,
+            dest='threads', default=1,
+            help="number of threads per gunicorn worker")
+        parser.add_argument('--large-size', action='store', type=int,
+            dest='large_size', default=1048576,
+            help="size in bytes of 'large' downloads")
+        parser.add_argument('--upload-size', action='store', type=int,
+            dest='upload_size', default=65536,
+            help="size in bytes of 'upload' request bodies")
+        parser.add_argument('--upstream', action='store', dest='upstream',
+            default=None,
+            help="entry point to forward to (default: a local stub server)")
+        parser.add_argument('--seed', action='store', type=int,
+            dest='seed', default=0,
+            help="seed for the random sequence of requests")
+        parser.add_argument('--output', action='store', dest='output',
+            default=None, help="file to write results into (default: stdout)")
+
+    def handle(self, *args, **options):
+        #pylint:disable=too-many-locals
+        mix = self.parse_mix(options['mix'])
+        host = '127.0.0.1'
+
+        upstream_process = None
+        entry_point = options['upstream']
+        if not entry_point:
+            upstream_port = get_free_port(host)
+            upstream_process = multiprocessing.Process(
+                target=serve_upstream, args=(host, upstream_port), daemon=True)
+            upstream_process.start()
+            wait_for_port(host, upstream_port)
+            entry_point = 'http://%s:%d' % (host, upstream_port)
+
+        app = get_current_app()
+        prev_entry_point = app.entry_point
+        password = get_random_string(16)
+        try:
+            user = self.setup(app, entry_point, password)
+            port = get_free_port(host)
+            server = self.start_server(host, port, options)
+            sampler = RSSSampler(server.pid)
+            try:
+                wait_for_port(host, port, process=server)
+                sampler.start()
+                results = self.run_clients('http://%s:%d' % (host, port),
+                    user.username, password, mix, options)
+            finally:
+                sampler.stopped.set()
+                server.send_signal(signal.SIGTERM)
+                server.wait(timeout=30)
+        finally:
+            Rule.objects.filter(
+                app=app, path__startswith=PATH_PREFIX + '/').delete()
+            app.entry_point = prev_entry_point
+            app.save()
+            get_user_model().objects.filter(username='loadtest').delete()
+            if upstream_process is not None:
+                upstream_process.terminate()
+                upstream_process.join()
+
+        results.update({
+            'workers': options['workers'],
+            'threads': options['threads'],
+            'concurrency': options['concurrency'],
+            'mix': mix,
+            'processes': [dict(pid=pid, **sample)
+                for pid, sample in sorted(sampler.samples.items())],
+        })
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+        else:
+            json.dump(results, sys.stdout, indent=2)
+            sys.stdout.write('\n')
+
+    @staticmethod
+    def parse_mix(mix):
+        weights = {}
+        for item in mix.split(','):
+            name, _, weight = item.partition('=')
+            name = name.strip()
+            if name not in SCENARIOS:
+                raise CommandError("unknown scenario '%s' (expected one of %s)"
+                    % (name, ', '.join(SCENARIOS)))
+            try:
+                weights[name] = int(weight) if weight else 1
+            except ValueError:
+                raise CommandError("invalid weight '%s' for '%s'" % (
+                    weight, name))
+        return weights
+
+    @staticmethod
+    def setup(app, entry_point, password):
+        app.entry_point = entry_point
+        app.save()
+        first_rank = Rule.objects.filter(app=app).order_by(
+            'rank').values_list('rank', flat=True).first() or 0
+        Rule.objects.filter(
+            app=app, path__startswith=PATH_PREFIX + '/').delete()
+        # Login required (1) and `fail_direct` (2) in testsite settings.
+        Rule.objects.bulk_create([
+            Rule(app=app, rank=first_rank - 4, path=PATH_PREFIX + '/small/',
+                rule_op=Rule.ANY, is_forward=True),
+            Rule(app=app, rank=first_rank - 3, path=PATH_PREFIX + '/large/',
+                rule_op=1, is_forward=True),
+            Rule(app=app, rank=first_rank - 2, path=PATH_PREFIX + '/upload/',
+                rule_op=1, is_forward=True),
+            Rule(app=app, rank=first_rank - 1,
+                path=PATH_PREFIX + '/denied/{profile}/',
+                rule_op=2, is_forward=True)])
+        user_model = get_user_model()
+        user_model.objects.filter(username='loadtest').delete()
+        user = user_model(username='loadtest')
+        user.set_password(password)
+        user.save()
+        return user
+
+    def start_server(self, host, port, options):
+        # Settings generate a random SECRET_KEY when none is configured,
+        # so workers must be forked after settings are loaded (--preload)
+        # for sessions to be valid across workers.
+        cmdline = [sys.executable, '-m', 'gunicorn', '--preload',
+            '--workers', str(options['workers']),
+            '--threads', str(options['threads']),
+            '--bind', '%s:%d' % (host, port),
+            '--log-level', 'warning', 'testsite.wsgi']
+        base_dir = settings.BASE_DIR
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(
+            [base_dir] + ([env['PYTHONPATH']] if env.get('PYTHONPATH') else []))
+        output = None if options['verbosity'] > 1 else subprocess.DEVNULL
+        return subprocess.Popen(cmdline, cwd=base_dir, env=env,
+            stdout=output, stderr=output)
+
+    def run_clients(self, base_url, username, password, mix, options):
+        #pylint:disable=too-many-locals
+        names = list(mix.keys())
+        weights = [mix[name] for name in names]
+        started_at = time.monotonic() + options['warmup']
+        ends_at = started_at + options['duration']
+        upload_body = b'x' * options['upload_size']
+
+        def login():
+            session = requests.Session()
+            session.get(base_url + '/login/')
+            resp = session.post(base_url + '/login/', data={
+                'username': username, 'password': password,
+                'csrfmiddlewaretoken': session.cookies.get('csrftoken')},
+                allow_redirects=False)
+            if resp.status_code != 302:
+                raise CommandError("login failed (%d)" % resp.status_code)
+            return session
+
+        def send(session, name):
+            if name == 'small':
+                return session.get(base_url + PATH_PREFIX + '/small/',
+                    headers={'Accept': 'application/json'})
+            if name == 'large':
+                return session.get(base_url + PATH_PREFIX + '/large/',
+                    params={'size': options['large_size']})
+            if name == 'upload':
+                return session.post(base_url + PATH_PREFIX + '/upload/',
+                    data=upload_body, headers={
+                        'Content-Type': 'application/octet-stream',
+                        'X-CSRFToken': session.cookies.get('csrftoken')})
+            if name == 'denied':
+                return session.get(
+                    base_url + PATH_PREFIX + '/denied/nobody/',
+                    headers={'Accept': 'application/json'})
+            return session.options(base_url + PATH_PREFIX + '/small/',
+                headers={'Origin': 'https://example.com',
+                    'Access-Control-Request-Method': 'POST'})
+
+        def client(seed):
+            rnd = random.Random(seed)
+            session = login()
+            measures = []
+            while True:
+                name = rnd.choices(names, weights)[0]
+                start = time.monotonic()
+                if start >= ends_at:
+                    break
+                try:
+                    status = send(session, name).status_code
+                except requests.RequestException:
+                    status = None
+                if start >= started_at:
+                    measures += [(name, status,
+                        round((time.monotonic() - start) * 1000, 3))]
+            return measures
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            measures = []
+            for client_measures in pool.map(client, [
+                    options['seed'] + idx
+                    for idx in range(options['concurrency'])]):
+                measures += client_measures
+
+        elapsed = options['duration']
+        results = summarize([measure[2] for measure in measures], elapsed)
+        statuses = {}
+        for _, status, _ in measures:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        results['statuses'] = statuses
+        results['scenarios'] = {}
+        for name in names:
+            results['scenarios'][name] = summarize(
+                [measure[2] for measure in measures if measure[0] == name],
+                elapsed)
+        return results
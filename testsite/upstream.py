@@ -0,0 +1,106 @@
+# Copyright (c) 2026, DjaoDjin inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED
+# TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+Local stub HTTP server used as the ``entry_point`` of the testsite app
+when measuring the proxy without external services.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class UpstreamHandler(BaseHTTPRequestHandler):
+    """
+    Responds to every request with a small JSON body, or with
+    ``?size=N`` bytes of content. ``?cookies=N`` adds N Set-Cookie headers.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args): #pylint:disable=redefined-builtin
+        pass
+
+    def respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        size = 0
+        cookies = 0
+        if '?' in self.path:
+            for param in self.path.split('?', 1)[1].split('&'):
+                key, _, value = param.partition('=')
+                if key == 'size' and value.isdigit():
+                    size = int(value)
+                elif key == 'cookies' and value.isdigit():
+                    cookies = int(value)
+        if size:
+            content_type = 'application/octet-stream'
+            body = b'x' * size
+        else:
+            content_type = 'application/json'
+            body = b'{"detail": "ok"}'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for idx in range(cookies):
+            self.send_header('Set-Cookie',
+                'cookie%d=value%d; Path=/; HttpOnly' % (idx, idx))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    do_GET = respond
+    do_HEAD = respond
+    do_POST = respond
+    do_PUT = respond
+    do_PATCH = respond
+    do_DELETE = respond
+    do_OPTIONS = respond
+
+
+def start_upstream(host='127.0.0.1', port=0):
+    """
+    Starts the stub server in a daemon thread and returns it. The base URL
+    is 'http://%s:%d' % server.server_address.
+    """
+    server = ThreadingHTTPServer((host, port), UpstreamHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def serve_upstream(host='127.0.0.1', port=0):
+    """
+    Runs the stub server in the current process until interrupted.
+    """
+    server = ThreadingHTTPServer((host, port), UpstreamHandler)
+    server.daemon_threads = True
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()